@@ -3,7 +3,7 @@ import subprocess
 import sys
 
 from hedge_it.commons import CliArgParser, CliArguments, CustomLogger
-from hedge_it.start import start
+from hedge_it.commons.constants import RUN_ALL, RUN_INGEST
 
 
 def main():
@@ -19,7 +19,8 @@ def main():
     os.environ["PYTHONPATH"] = os.pathsep.join(sys.path)
     os.environ["HEDGE_ENV"] = str(vars(args))
     #For Debugging
-    # start(CliArguments(**vars(args)))
+    # from hedge_it.start import start; start(CliArguments(**vars(args)))
+    return CliArguments(**vars(args))
 
 def run_streamlit():
     """
@@ -34,5 +35,16 @@ def run_streamlit():
 
 
 if __name__ == "__main__":
-    main()
-    run_streamlit()
+    cli_args = main()
+    # The ingestion stack (pandas, duckdb, yfinance) is only imported when
+    # needed and the dashboard stack only in the Streamlit process.
+    if cli_args.run_mode == RUN_INGEST:
+        from hedge_it.ingestion import run_ingestion
+
+        run_ingestion(cli_args)
+    else:
+        if cli_args.run_mode == RUN_ALL:
+            from hedge_it.ingestion import start_ingestion_thread
+
+            start_ingestion_thread(cli_args)
+        run_streamlit()
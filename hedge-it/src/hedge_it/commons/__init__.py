@@ -2,5 +2,6 @@ from .utils.arg_parser import CliArgParser
 from .utils.custom_logger import CustomLogger, get_logger
 from .models.cli_args import CliArguments 
 from .utils.batch_utils import chunked_iterable
+from .utils.instrumentation import configure_metrics, span, timed
 
-__all__ = ("CliArgParser", "CustomLogger", "get_logger", "CliArguments","chunked_iterable")
+__all__ = ("CliArgParser", "CustomLogger", "get_logger", "CliArguments","chunked_iterable", "configure_metrics", "span", "timed")
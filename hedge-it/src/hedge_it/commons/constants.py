@@ -2,6 +2,25 @@ LOG_LEVEL = "log_level"
 RUN_MODE = "run_mode"
 POLYGON_API_KEY = "polygon_api_key"
 STOCK_LIMIT = "stock_limit"
+INCREMENTAL = "incremental"
+CHUNK_SIZE = "chunk_size"
+MAX_WORKERS = "max_workers"
+PARSE_WORKERS = "parse_workers"
+YAHOO_RATE_LIMIT = "yahoo_rate_limit"
+FUNDAMENTALS_TTL = "fundamentals_ttl"
+EXCHANGES = "exchanges"
+POLYGON_RATE_LIMIT = "polygon_rate_limit"
+DUCKDB_MEMORY_LIMIT = "duckdb_memory_limit"
+DUCKDB_THREADS = "duckdb_threads"
+LOOKBACK = "lookback"
+HISTORY_STORE = "history_store"
+CACHE_TTL = "cache_ttl"
+INGEST_INTERVAL = "ingest_interval"
+METRICS_FILE = "metrics_file"
+METRICS_PORT = "metrics_port"
+DATA_SOURCE = "data_source"
+FIXTURES = "fixtures"
+LIVE_FEED = "live_feed"
 TICKER = "Ticker"
 DATE = "Date"
 SHARES = "Shares"
@@ -17,7 +36,44 @@ LOW = "Low"
 HIGH = "High"
 VOLUME = "Volume"
 STOCKS = "stocks"
+TABLE_PRICES = "stock_prices"
 STOCK_COUNT = "StockCount"
 TABLE_TOPM ="TopMcap"
 EQUAL_WEIGHTED_INDEX = "EqualWeightedIndex"
-VALUE = "Value"
\ No newline at end of file
+DIVISOR = "Divisor"
+REBALANCE_DATE = "RebalanceDate"
+REFERENCE_CLOSE = "ReferenceClose"
+ENTERED = "Entered"
+EXITED = "Exited"
+INDEX_NAME = "IndexName"
+LEVEL = "Level"
+TABLE_INDEX_MEMBERS = "IndexMembers"
+TABLE_INDICES = "indices"
+EQUAL_WEIGHT = "equal"
+CAP_WEIGHT = "cap"
+TABLE_ANALYTICS = "index_analytics"
+DAILY_RETURN = "DailyReturn"
+WEEKLY_RETURN = "WeeklyReturn"
+MONTHLY_RETURN = "MonthlyReturn"
+CUMULATIVE_RETURN = "CumulativeReturn"
+DRAWDOWN = "Drawdown"
+ROLLING_VOLATILITY = "RollingVolatility"
+TURNOVER = "Turnover"
+VALUE = "Value"
+TABLE_FUNDAMENTALS = "fundamentals"
+FETCHED_AT = "FetchedAt"
+HISTORY_DIR = "history"
+PARTITION_YEAR = "year"
+PARTITION_MONTH = "month"
+SNAPSHOT_DIR = "snapshots"
+RUN_ALL = "all"
+RUN_DASHBOARD = "dashboard"
+RUN_INGEST = "ingest"
+FIXTURES_DIR = "fixtures"
+LIVE = "live"
+RECORD = "record"
+REPLAY = "replay"
+FEED_OFF = "off"
+FEED_SIMULATED = "simulated"
+FEED_POLYGON = "polygon"
+YAHOO_LIMITER_DB = "yahoo_limiter.sqlite"
@@ -10,8 +10,73 @@ class CliArguments:
     log_level: str
     polygon_api_key: str
     stock_limit: int
+    incremental: bool
+    chunk_size: int
+    max_workers: int
+    parse_workers: int
+    yahoo_rate_limit: float
+    fundamentals_ttl: int
+    exchanges: list
+    polygon_rate_limit: int
+    duckdb_memory_limit: str
+    duckdb_threads: int
+    lookback: int
+    history_store: bool
+    cache_ttl: int
+    run_mode: str
+    ingest_interval: int
+    metrics_file: str
+    metrics_port: int
+    data_source: str
+    fixtures: str
+    live_feed: str
 
-    def __init__(self, log_level: str, polygon_api_key: str,stock_limit:int):
+    def __init__(
+        self,
+        log_level: str,
+        polygon_api_key: str,
+        stock_limit: int,
+        incremental: bool = False,
+        chunk_size: int = 50,
+        max_workers: int = 8,
+        parse_workers: int = 0,
+        yahoo_rate_limit: float = 10.0,
+        fundamentals_ttl: int = 7,
+        exchanges: list = ["XNYS"],
+        polygon_rate_limit: int = 5,
+        duckdb_memory_limit: str = None,
+        duckdb_threads: int = None,
+        lookback: int = 30,
+        history_store: bool = False,
+        cache_ttl: int = 60,
+        run_mode: str = "all",
+        ingest_interval: int = 60,
+        metrics_file: str = None,
+        metrics_port: int = None,
+        data_source: str = "live",
+        fixtures: str = "fixtures",
+        live_feed: str = "off",
+    ):
         self.log_level = log_level
         self.polygon_api_key = polygon_api_key
         self.stock_limit = stock_limit
+        self.incremental = incremental
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.parse_workers = parse_workers
+        self.yahoo_rate_limit = yahoo_rate_limit
+        self.fundamentals_ttl = fundamentals_ttl
+        self.exchanges = exchanges
+        self.polygon_rate_limit = polygon_rate_limit
+        self.duckdb_memory_limit = duckdb_memory_limit
+        self.duckdb_threads = duckdb_threads
+        self.lookback = lookback
+        self.history_store = history_store
+        self.cache_ttl = cache_ttl
+        self.run_mode = run_mode
+        self.ingest_interval = ingest_interval
+        self.metrics_file = metrics_file
+        self.metrics_port = metrics_port
+        self.data_source = data_source
+        self.fixtures = fixtures
+        self.live_feed = live_feed
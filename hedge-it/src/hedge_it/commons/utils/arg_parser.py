@@ -1,7 +1,41 @@
 import sys
 from argparse import ArgumentParser
 
-from hedge_it.commons.constants import LOG_LEVEL, POLYGON_API_KEY, STOCK_LIMIT
+from hedge_it.commons.constants import (
+    CACHE_TTL,
+    CHUNK_SIZE,
+    DATA_SOURCE,
+    DUCKDB_MEMORY_LIMIT,
+    DUCKDB_THREADS,
+    EXCHANGES,
+    FEED_OFF,
+    FEED_POLYGON,
+    FEED_SIMULATED,
+    FIXTURES,
+    FIXTURES_DIR,
+    FUNDAMENTALS_TTL,
+    HISTORY_STORE,
+    INCREMENTAL,
+    INGEST_INTERVAL,
+    LIVE,
+    LIVE_FEED,
+    LOG_LEVEL,
+    LOOKBACK,
+    MAX_WORKERS,
+    METRICS_FILE,
+    METRICS_PORT,
+    PARSE_WORKERS,
+    POLYGON_API_KEY,
+    POLYGON_RATE_LIMIT,
+    RECORD,
+    REPLAY,
+    RUN_ALL,
+    RUN_DASHBOARD,
+    RUN_INGEST,
+    RUN_MODE,
+    STOCK_LIMIT,
+    YAHOO_RATE_LIMIT,
+)
 
 
 class CustomArgumentParser(ArgumentParser):
@@ -27,6 +61,13 @@ class CliArgParser(object):
         self._set_common_arguments()
 
     def _set_common_arguments(self):
+        self._common_parser.add_argument(
+            RUN_MODE,
+            nargs="?",
+            choices=[RUN_ALL, RUN_DASHBOARD, RUN_INGEST],
+            default=RUN_ALL,
+            help="Run the ingestion worker, the dashboard, or both (default).",
+        )
         self._common_parser.add_argument(
             "-l",
             f"--{LOG_LEVEL}",
@@ -39,7 +80,157 @@ class CliArgParser(object):
             "-pak", f"--{POLYGON_API_KEY}", required=True, help="Polygon API Key."
         )
         self._common_parser.add_argument(
-            "-sl", f"--{STOCK_LIMIT}", required=False,default=2000, help="Stock Limit, Limit to avoid rate limiting of yfin."
+            "-sl",
+            f"--{STOCK_LIMIT}",
+            required=False,
+            default=2000,
+            help="Stock Limit, Limit to avoid rate limiting of yfin.",
+        )
+        self._common_parser.add_argument(
+            "-inc",
+            f"--{INCREMENTAL}",
+            action="store_true",
+            help="Fetch only trading days missing from stocks.duckdb and upsert them.",
+        )
+        self._common_parser.add_argument(
+            "-cs",
+            f"--{CHUNK_SIZE}",
+            type=int,
+            default=50,
+            required=False,
+            help="Tickers per raw chart batch handed to the parse workers, with -pw only. "
+            "Without -pw history is downloaded ticker by ticker.",
+        )
+        self._common_parser.add_argument(
+            "-w",
+            f"--{MAX_WORKERS}",
+            type=int,
+            default=8,
+            required=False,
+            help="Number of concurrent history download batches.",
+        )
+        self._common_parser.add_argument(
+            "-pw",
+            f"--{PARSE_WORKERS}",
+            type=int,
+            default=0,
+            required=False,
+            help="Processes parsing raw Yahoo chart responses, 0 to parse through yfinance on the download threads.",
+        )
+        self._common_parser.add_argument(
+            "-yr",
+            f"--{YAHOO_RATE_LIMIT}",
+            type=float,
+            default=10.0,
+            required=False,
+            help="Most Yahoo requests per second, the limiter adapts below it to what Yahoo sustains.",
+        )
+        self._common_parser.add_argument(
+            "-ft",
+            f"--{FUNDAMENTALS_TTL}",
+            type=int,
+            default=7,
+            required=False,
+            help="Days before cached ticker fundamentals are re-fetched.",
+        )
+        self._common_parser.add_argument(
+            "-ex",
+            f"--{EXCHANGES}",
+            nargs="+",
+            default=["XNYS"],
+            required=False,
+            help="Exchanges (MIC codes) to list tickers from.",
+        )
+        self._common_parser.add_argument(
+            "-prl",
+            f"--{POLYGON_RATE_LIMIT}",
+            type=int,
+            default=5,
+            required=False,
+            help="Polygon API calls per minute allowed by the plan.",
+        )
+        self._common_parser.add_argument(
+            "-dml",
+            f"--{DUCKDB_MEMORY_LIMIT}",
+            default=None,
+            required=False,
+            help="DuckDB memory_limit pragma, e.g. 2GB. DuckDB default when omitted.",
+        )
+        self._common_parser.add_argument(
+            "-dt",
+            f"--{DUCKDB_THREADS}",
+            type=int,
+            default=None,
+            required=False,
+            help="DuckDB threads pragma. DuckDB default when omitted.",
+        )
+        self._common_parser.add_argument(
+            "-lb",
+            f"--{LOOKBACK}",
+            type=int,
+            default=30,
+            required=False,
+            help="Calendar days of history to fetch and build the index over.",
+        )
+        self._common_parser.add_argument(
+            "-hs",
+            f"--{HISTORY_STORE}",
+            action="store_true",
+            help="Keep stocks in a year/month partitioned Parquet store and build the index from it.",
+        )
+        self._common_parser.add_argument(
+            "-ct",
+            f"--{CACHE_TTL}",
+            type=int,
+            default=60,
+            required=False,
+            help="Minutes the dashboard data is shared across sessions before refreshing.",
+        )
+        self._common_parser.add_argument(
+            "-ii",
+            f"--{INGEST_INTERVAL}",
+            type=int,
+            default=60,
+            required=False,
+            help="Minutes between ingestion runs, 0 to ingest once and exit.",
+        )
+        self._common_parser.add_argument(
+            "-mf",
+            f"--{METRICS_FILE}",
+            default=None,
+            required=False,
+            help="Append per stage ingestion metrics to this JSON lines file.",
+        )
+        self._common_parser.add_argument(
+            "-mp",
+            f"--{METRICS_PORT}",
+            type=int,
+            default=None,
+            required=False,
+            help="Serve ingestion metrics for Prometheus on this port at /metrics.",
+        )
+        self._common_parser.add_argument(
+            "-ds",
+            f"--{DATA_SOURCE}",
+            choices=[LIVE, RECORD, REPLAY],
+            default=LIVE,
+            required=False,
+            help="Fetch from Polygon/Yahoo, also record the responses, or replay recorded ones offline.",
+        )
+        self._common_parser.add_argument(
+            "-fx",
+            f"--{FIXTURES}",
+            default=FIXTURES_DIR,
+            required=False,
+            help="Directory of the recorded responses.",
+        )
+        self._common_parser.add_argument(
+            "-lf",
+            f"--{LIVE_FEED}",
+            choices=[FEED_OFF, FEED_SIMULATED, FEED_POLYGON],
+            default=FEED_OFF,
+            required=False,
+            help="Move the index intraday on the dashboard from Polygon trades or a simulated feed.",
         )
 
     def _set_common_local_args(self):
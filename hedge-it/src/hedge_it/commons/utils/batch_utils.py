@@ -1,7 +1,7 @@
-
 from itertools import islice
 
+
 def chunked_iterable(iterable, size):
     it = iter(iterable)
     while chunk := list(islice(it, size)):
-        yield chunk
\ No newline at end of file
+        yield chunk
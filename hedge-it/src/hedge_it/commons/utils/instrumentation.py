@@ -0,0 +1,236 @@
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .custom_logger import get_logger
+
+log = get_logger()
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+@dataclass
+class StageSpan:
+    """
+    Metrics of one run of a pipeline stage.
+
+    HTTP calls and cache hits are the process wide counts while the stage ran,
+    so stages running concurrently on other threads are included. The RSS
+    delta is the change of the process' current resident memory over the
+    stage, what the stage kept allocated; peak RSS is the process high-water
+    mark at the end of the stage, the same for every later stage once reached.
+    """
+
+    stage: str
+    rows_in: int = None
+    rows_out: int = None
+    started_at: float = None
+    wall_seconds: float = None
+    http_calls: int = 0
+    cache_hits: int = 0
+    rss_delta_bytes: int = None
+    peak_rss_bytes: int = None
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        return self.cache_hits / self.http_calls if self.http_calls else None
+
+
+_lock = threading.Lock()
+_http = {"calls": 0, "cache_hits": 0}
+_last_spans = {}
+_stage_totals = {}
+_jsonl_file = None
+_server = None
+
+
+def record_http_response(response, *args, **kwargs):
+    """Count an HTTP call of the shared session, a cache hit when `from_cache`."""
+    from_cache = getattr(response, "from_cache", None)
+    if from_cache is not None:
+        with _lock:
+            _http["calls"] += 1
+            _http["cache_hits"] += int(from_cache)
+    return response
+
+
+def current_rss() -> int:
+    """Current resident memory of the process, None without /proc (macOS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss() -> int:
+    """High-water mark of the process' resident memory."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+
+def _rows(value) -> int:
+    if isinstance(value, tuple):
+        value = value[0] if value else None
+    return len(value) if hasattr(value, "__len__") else None
+
+
+def _record(stage_span: StageSpan):
+    with _lock:
+        _last_spans[stage_span.stage] = stage_span
+        runs, seconds = _stage_totals.get(stage_span.stage, (0, 0.0))
+        _stage_totals[stage_span.stage] = (runs + 1, seconds + stage_span.wall_seconds)
+        if _jsonl_file:
+            with open(_jsonl_file, "a") as f:
+                f.write(
+                    json.dumps(
+                        {
+                            **asdict(stage_span),
+                            "cache_hit_ratio": stage_span.cache_hit_ratio,
+                        },
+                        default=str,
+                    )
+                    + "\n"
+                )
+    rss_delta = (
+        f"{stage_span.rss_delta_bytes / 2**20:+.0f} MiB"
+        if stage_span.rss_delta_bytes is not None
+        else "n/a"
+    )
+    log.info(
+        f"Stage {stage_span.stage}: {stage_span.wall_seconds:.3f}s, rows {stage_span.rows_in} -> {stage_span.rows_out}, "
+        f"http {stage_span.http_calls} (cached {stage_span.cache_hits}), rss {rss_delta}, "
+        f"process peak rss {stage_span.peak_rss_bytes / 2**20:.0f} MiB"
+    )
+
+
+@contextmanager
+def span(stage: str, rows_in: int = None):
+    """
+    Time the enclosed block as `stage`. Set `rows_out` on the yielded span.
+
+        with span("persist", rows_in=len(df)) as s:
+            s.rows_out = persist(df)
+    """
+    stage_span = StageSpan(stage, rows_in=rows_in, started_at=time.time())
+    with _lock:
+        calls, hits = _http["calls"], _http["cache_hits"]
+    rss_before = current_rss()
+    started = time.perf_counter()
+    try:
+        yield stage_span
+    finally:
+        stage_span.wall_seconds = time.perf_counter() - started
+        with _lock:
+            stage_span.http_calls = _http["calls"] - calls
+            stage_span.cache_hits = _http["cache_hits"] - hits
+        rss_after = current_rss()
+        if rss_before is not None and rss_after is not None:
+            stage_span.rss_delta_bytes = rss_after - rss_before
+        stage_span.peak_rss_bytes = peak_rss()
+        _record(stage_span)
+
+
+def timed(stage: str):
+    """Decorator recording a span per call, rows in/out from the first argument and result."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage, rows_in=_rows(args[0]) if args else None) as stage_span:
+                result = func(*args, **kwargs)
+                stage_span.rows_out = _rows(result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def prometheus_text() -> str:
+    """Latest stage metrics in the Prometheus text exposition format."""
+    gauges = {
+        "stage_seconds": ("Wall time of the last run.", "wall_seconds"),
+        "stage_rows_in": ("Rows into the last run.", "rows_in"),
+        "stage_rows_out": ("Rows out of the last run.", "rows_out"),
+        "stage_http_calls": ("HTTP calls during the last run.", "http_calls"),
+        "stage_cache_hit_ratio": (
+            "Share of HTTP calls served from cache in the last run.",
+            "cache_hit_ratio",
+        ),
+        "stage_rss_delta_bytes": (
+            "Change of the process' current RSS over the last run.",
+            "rss_delta_bytes",
+        ),
+    }
+    lines = []
+    with _lock:
+        for name, (help_text, attribute) in gauges.items():
+            lines += [
+                f"# HELP hedge_it_{name} {help_text}",
+                f"# TYPE hedge_it_{name} gauge",
+            ]
+            for stage, stage_span in _last_spans.items():
+                value = getattr(stage_span, attribute)
+                if value is not None:
+                    lines.append(f'hedge_it_{name}{{stage="{stage}"}} {value}')
+        lines += [
+            "# HELP hedge_it_process_peak_rss_bytes Process peak RSS.",
+            "# TYPE hedge_it_process_peak_rss_bytes gauge",
+            f"hedge_it_process_peak_rss_bytes {peak_rss()}",
+            "# HELP hedge_it_stage_runs_total Completed runs.",
+            "# TYPE hedge_it_stage_runs_total counter",
+            *(
+                f'hedge_it_stage_runs_total{{stage="{stage}"}} {runs}'
+                for stage, (runs, _) in _stage_totals.items()
+            ),
+            "# HELP hedge_it_stage_seconds_total Wall time of all runs.",
+            "# TYPE hedge_it_stage_seconds_total counter",
+            *(
+                f'hedge_it_stage_seconds_total{{stage="{stage}"}} {seconds}'
+                for stage, (_, seconds) in _stage_totals.items()
+            ),
+            "# HELP hedge_it_http_requests_total HTTP calls made through the shared session.",
+            "# TYPE hedge_it_http_requests_total counter",
+            f'hedge_it_http_requests_total{{cached="true"}} {_http["cache_hits"]}',
+            f'hedge_it_http_requests_total{{cached="false"}} {_http["calls"] - _http["cache_hits"]}',
+        ]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def configure_metrics(jsonl_file: str = None, port: int = None):
+    """
+    Append every span to `jsonl_file` and serve `/metrics` on `port`, each
+    only when given.
+    """
+    global _jsonl_file, _server
+    _jsonl_file = jsonl_file
+    if port and _server is None:
+        _server = ThreadingHTTPServer(("", port), _MetricsHandler)
+        threading.Thread(
+            target=_server.serve_forever, name="metrics", daemon=True
+        ).start()
+        log.info(f"Serving Prometheus metrics on :{port}/metrics")
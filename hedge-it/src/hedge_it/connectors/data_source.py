@@ -0,0 +1,255 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+
+import pandas as pd
+
+from hedge_it.commons import get_logger
+from hedge_it.commons.constants import FIXTURES_DIR, LIVE, RECORD, REPLAY
+from hedge_it.processor.chart_parser import chart_payload, parse_chart
+
+from .rate_limit import yahoo_limiter
+
+log = get_logger()
+
+MANIFEST_FILE = "manifest.json"
+LISTING_FILE = "listing.json"
+INFO_FIXTURES = "info"
+HISTORY_FIXTURES = "history"
+
+CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{ticker}"
+CHART_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+class DataSource(ABC):
+    """Upstream calls made by ingestion: Polygon listing, Yahoo info and history."""
+
+    @abstractmethod
+    def listing(self, polygon_key: str, exchanges: list, calls_per_minute: int) -> list:
+        """Polygon reference tickers listed on `exchanges`."""
+
+    @abstractmethod
+    def ticker_info(self, ticker: str) -> dict:
+        """Yahoo info of `ticker`, empty if unknown."""
+
+    @abstractmethod
+    def ticker_history(self, ticker: str, period=None, start=None) -> pd.DataFrame:
+        """Yahoo daily bars of `ticker` over `period` or from `start` on."""
+
+    @abstractmethod
+    def ticker_chart(self, ticker: str, start) -> bytes:
+        """Raw Yahoo chart JSON of the daily bars from `start` on, empty if unknown."""
+
+
+class LiveSource(DataSource):
+    """
+    Polygon and Yahoo over the network. Every Yahoo call goes through the
+    cached curl_cffi `session` and the shared adaptive rate limiter, and is
+    retried while throttled.
+
+    The polygon and yfinance clients and the session are imported on the first
+    call, so replaying or just starting up does not pay for them.
+    """
+
+    def listing(self, polygon_key: str, exchanges: list, calls_per_minute: int) -> list:
+        from .ticker_listing import ticker_by_exchange
+
+        return ticker_by_exchange(
+            polygon_key, *exchanges, calls_per_minute=calls_per_minute
+        )
+
+    @staticmethod
+    def _yahoo(func, is_throttled=None):
+        from yfinance.exceptions import YFRateLimitError
+
+        return yahoo_limiter().call(
+            func, is_throttled=is_throttled, throttle_errors=(YFRateLimitError,)
+        )
+
+    def ticker_info(self, ticker: str) -> dict:
+        import yfinance as yf
+
+        from .session import session
+
+        # Yahoo answers a throttled quoteSummary with an empty info.
+        return self._yahoo(
+            lambda: yf.Ticker(ticker, session=session).info, lambda info: not info
+        )
+
+    def ticker_history(self, ticker: str, period=None, start=None) -> pd.DataFrame:
+        import yfinance as yf
+
+        from .session import session
+
+        return self._yahoo(
+            lambda: yf.Ticker(ticker, session=session).history(
+                period=period, start=start, timeout=20
+            )
+        )
+
+    def ticker_chart(self, ticker: str, start) -> bytes:
+        from .session import session
+
+        response = yahoo_limiter().call(
+            session.get,
+            CHART_URL.format(ticker=ticker),
+            params={
+                "period1": int(pd.Timestamp(start).timestamp()),
+                "period2": int(time.time()),
+                "interval": "1d",
+                "events": "div,splits",
+            },
+            headers=CHART_HEADERS,
+            timeout=20,
+            is_throttled=lambda response: response.status_code == 429,
+        )
+        if response.status_code == 404:
+            return b""
+        response.raise_for_status()
+        return response.content
+
+
+class RecordingSource(LiveSource):
+    """
+    Live source that also keeps every response under `fixtures_dir`:
+    the listing per exchange as JSON, ticker info as one JSON file per ticker
+    and history, from yfinance or parsed chart responses, as one Parquet file
+    per ticker, merged across runs. The manifest keeps the date of the first
+    run into `fixtures_dir`, the one replays shift the dates from.
+    """
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR):
+        self.fixtures_dir = fixtures_dir
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(fixtures_dir, INFO_FIXTURES), exist_ok=True)
+        os.makedirs(os.path.join(fixtures_dir, HISTORY_FIXTURES), exist_ok=True)
+        manifest_file = os.path.join(fixtures_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_file):
+            with open(manifest_file, "w") as f:
+                json.dump({"recorded_on": date.today().isoformat()}, f)
+
+    def listing(self, polygon_key: str, exchanges: list, calls_per_minute: int) -> list:
+        tickers = super().listing(polygon_key, exchanges, calls_per_minute)
+        listing_file = os.path.join(self.fixtures_dir, LISTING_FILE)
+        with self._lock:
+            recorded = {}
+            if os.path.exists(listing_file):
+                with open(listing_file) as f:
+                    recorded = json.load(f)
+            for exchange in exchanges:
+                recorded[exchange] = [
+                    t for t in tickers if t["primary_exchange"] == exchange
+                ]
+            with open(listing_file, "w") as f:
+                json.dump(recorded, f)
+        return tickers
+
+    def ticker_info(self, ticker: str) -> dict:
+        info = super().ticker_info(ticker)
+        with open(
+            os.path.join(self.fixtures_dir, INFO_FIXTURES, f"{ticker}.json"), "w"
+        ) as f:
+            json.dump(info, f, default=str)
+        return info
+
+    def _record_history(self, ticker: str, history: pd.DataFrame):
+        history_file = os.path.join(
+            self.fixtures_dir, HISTORY_FIXTURES, f"{ticker}.parquet"
+        )
+        recorded = history
+        if os.path.exists(history_file):
+            recorded = pd.concat([pd.read_parquet(history_file), history])
+            recorded = recorded[~recorded.index.duplicated(keep="last")].sort_index()
+        recorded.to_parquet(history_file)
+
+    def ticker_history(self, ticker: str, period=None, start=None) -> pd.DataFrame:
+        history = super().ticker_history(ticker, period, start)
+        if not history.empty:
+            self._record_history(ticker, history)
+        return history
+
+    def ticker_chart(self, ticker: str, start) -> bytes:
+        payload = super().ticker_chart(ticker, start)
+        history = parse_chart(payload) if payload else pd.DataFrame()
+        if not history.empty:
+            self._record_history(ticker, history)
+        return payload
+
+
+class ReplaySource(DataSource):
+    """
+    Serves responses recorded by `RecordingSource` from disk, no network.
+
+    Recorded dates are moved forward by the whole weeks elapsed since the
+    recording, so a replay lands inside the current lookback window on the same
+    weekdays. Anything not recorded comes back empty, like an unknown ticker.
+    """
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR):
+        self.fixtures_dir = fixtures_dir
+        manifest_file = os.path.join(fixtures_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_file):
+            raise FileNotFoundError(
+                f"No recording in {fixtures_dir}, ingest once with the record data source first."
+            )
+        with open(manifest_file) as f:
+            recorded_on = date.fromisoformat(json.load(f)["recorded_on"])
+        self.shift = timedelta(weeks=(date.today() - recorded_on).days // 7)
+        log.info(
+            f"Replaying {fixtures_dir} recorded on {recorded_on}, shift: {self.shift}"
+        )
+
+    def listing(self, polygon_key: str, exchanges: list, calls_per_minute: int) -> list:
+        with open(os.path.join(self.fixtures_dir, LISTING_FILE)) as f:
+            recorded = json.load(f)
+        return [
+            ticker for exchange in exchanges for ticker in recorded.get(exchange, [])
+        ]
+
+    def ticker_info(self, ticker: str) -> dict:
+        info_file = os.path.join(self.fixtures_dir, INFO_FIXTURES, f"{ticker}.json")
+        if not os.path.exists(info_file):
+            return {}
+        with open(info_file) as f:
+            return json.load(f)
+
+    def ticker_history(self, ticker: str, period=None, start=None) -> pd.DataFrame:
+        history_file = os.path.join(
+            self.fixtures_dir, HISTORY_FIXTURES, f"{ticker}.parquet"
+        )
+        if not os.path.exists(history_file):
+            return pd.DataFrame()
+        history = pd.read_parquet(history_file)
+        history.index = history.index + self.shift
+        if start is not None:
+            history = history[history.index.tz_localize(None) >= pd.Timestamp(start)]
+        return history
+
+    def ticker_chart(self, ticker: str, start) -> bytes:
+        history = self.ticker_history(ticker, start=start)
+        return chart_payload(ticker, history) if not history.empty else b""
+
+
+_source = LiveSource()
+
+
+def configure_data_source(
+    mode: str = LIVE, fixtures_dir: str = FIXTURES_DIR
+) -> DataSource:
+    """Select the process wide data source: live, record or replay."""
+    global _source
+    if mode == RECORD:
+        _source = RecordingSource(fixtures_dir)
+    elif mode == REPLAY:
+        _source = ReplaySource(fixtures_dir)
+    else:
+        _source = LiveSource()
+    log.info(f"Data source: {mode}, fixtures: {fixtures_dir}")
+    return _source
+
+
+def data_source() -> DataSource:
+    return _source
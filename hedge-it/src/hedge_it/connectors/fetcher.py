@@ -1,17 +1,19 @@
-import os
-from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 
 import pandas as pd
-from polygon import ReferenceClient
 
-from hedge_it.commons import get_logger
+from hedge_it.commons import get_logger, span
 from hedge_it.commons.constants import DISPLAY_NAME, SHARES, TICKER
+from hedge_it.processor.duck_db import persist_fundamentals, read_fundamentals
 
 from .ticker_history import (
+    fetch_chart_history,
+    fetch_incremental_history,
     fetch_ticker_history,
-    ticker_by_exchange,
+    map_with_retry_queue,
     ticker_outstanding_shares,
 )
+from .data_source import data_source
 
 log = get_logger()
 
@@ -21,10 +23,27 @@ def fetch_stocks(
     exchanges: list = ["XNYS"],
     stock_limit: int = 200,
     chunk_size: int = 50,
-) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Fetch Tickers from Polygon API. Free Polygon has limit of 5 calls per minute.
+    latest_dates: dict | None = None,
+    max_workers: int = 8,
+    fundamentals_ttl: int = 7,
+    polygon_rate_limit: int = 5,
+    lookback: int = 30,
+    parse_workers: int = 0,
+) -> pd.DataFrame:
+    """Fetch Tickers from Polygon API. Free Polygon has limit of 5 calls per minute,
+    `polygon_rate_limit` raises it for paid plans.
     Fetch stock history & outstanding share info from Yahoo Finance API.
     Yahoo Finance API has a limit of 2,000 calls per hour(not sure), IP based.
+    History covers the last `lookback` calendar days. When `latest_dates`
+    (ticker -> last persisted date) is given only the missing trading days are
+    fetched. History is downloaded ticker by ticker on `max_workers` threads.
+    Fundamentals are read from the local store and only re-fetched, and
+    persisted, when older than `fundamentals_ttl` days; the `stocks` view
+    joins them in, so only the history is returned.
+    With `parse_workers` the raw chart responses are fetched in `chunk_size`
+    batches and parsed on that many processes, and the history comes back
+    long, as `process_ticker_data` returns it, instead of as the wide
+    yfinance frame.
     """
 
     def process_results(results: list[dict]) -> pd.DataFrame:
@@ -37,17 +56,59 @@ def fetch_stocks(
             log.error("No valid data to concat stocks.")
             return pd.DataFrame()
 
-    poly_ref_client = ReferenceClient(api_key=polygon_key)
-    tickers = ticker_by_exchange(poly_ref_client, *exchanges)
+    with span("polygon_listing") as listing_span:
+        tickers = data_source().listing(polygon_key, exchanges, polygon_rate_limit)
+        listing_span.rows_out = len(tickers)
     ticker_names = [t["ticker"] for t in tickers[:stock_limit]]
 
-    with ThreadPoolExecutor(max_workers=os.cpu_count() * 10) as executor:
-        res_shares = executor.map(ticker_outstanding_shares, ticker_names)
+    with span("fundamentals", rows_in=len(ticker_names)) as fundamentals_span:
+        cached_shares = read_fundamentals(ticker_names, fundamentals_ttl)
+        cached_tickers = set(cached_shares[TICKER])
+        stale_tickers = [t for t in ticker_names if t not in cached_tickers]
+        log.info(
+            f"Fundamentals cached: {len(cached_tickers)}, to fetch: {len(stale_tickers)}"
+        )
 
-    ticker_shares = process_results(res_shares)
+        fetched_shares = pd.DataFrame()
+        if stale_tickers:
+            res_shares = map_with_retry_queue(
+                ticker_outstanding_shares, stale_tickers, max_workers
+            )
+            fetched_shares = process_results(res_shares)
+        if not fetched_shares.empty:
+            persist_fundamentals(fetched_shares)
+        ticker_shares = pd.concat([cached_shares, fetched_shares], ignore_index=True)
+        fundamentals_span.rows_out = len(ticker_shares)
 
-    ticker_stocks = fetch_ticker_history(ticker_shares[TICKER].unique().tolist())
+    history_tickers = ticker_shares[TICKER].unique().tolist()
+    lookback_start = date.today() - timedelta(days=lookback)
+    with span("yahoo_history", rows_in=len(history_tickers)) as history_span:
+        if parse_workers:
+            ticker_stocks = fetch_chart_history(
+                history_tickers,
+                latest_dates,
+                default_start=lookback_start,
+                chunk_size=chunk_size,
+                max_workers=max_workers,
+                parse_workers=parse_workers,
+            )
+        elif latest_dates:
+            ticker_stocks = fetch_incremental_history(
+                history_tickers,
+                latest_dates,
+                default_start=lookback_start,
+                max_workers=max_workers,
+            )
+        else:
+            ticker_stocks = fetch_ticker_history(
+                history_tickers,
+                start=lookback_start,
+                max_workers=max_workers,
+            )
+        if ticker_stocks is None:
+            ticker_stocks = pd.DataFrame()
+        history_span.rows_out = len(ticker_stocks)
     log.info(
         f"fetch_stocks Completed. Stocks: {ticker_stocks.shape}, Shares: {ticker_shares.shape}"
     )
-    return ticker_stocks, ticker_shares
+    return ticker_stocks
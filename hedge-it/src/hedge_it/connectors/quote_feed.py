@@ -0,0 +1,153 @@
+import json
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from hedge_it.commons import get_logger
+from hedge_it.commons.constants import FEED_POLYGON, FEED_SIMULATED
+
+log = get_logger()
+
+
+class QuoteFeed(ABC):
+    """
+    Trades of the subscribed tickers. Iterating yields batches of
+    (ticker, price) pairs, in arrival order, until the feed is closed.
+    """
+
+    def __init__(self):
+        self._closed = threading.Event()
+
+    @abstractmethod
+    def __iter__(self):
+        """Batches of (ticker, price) trades until `close`."""
+
+    def close(self):
+        self._closed.set()
+
+
+class SimulatedFeed(QuoteFeed):
+    """
+    Local random walk standing in for the exchange: trades of random tickers,
+    each moving its price by a lognormal step, at `ticks_per_second` (as fast
+    as possible when 0) in batches of `batch_size`.
+    """
+
+    def __init__(
+        self,
+        tickers: list,
+        prices: list,
+        ticks_per_second: int = 5000,
+        batch_size: int = 250,
+        volatility: float = 0.0005,
+        seed: int = None,
+    ):
+        super().__init__()
+        self.tickers = list(tickers)
+        self.prices = [float(price) for price in prices]
+        self.ticks_per_second = ticks_per_second
+        self.batch_size = batch_size
+        self.volatility = volatility
+        self.seed = seed
+
+    def __iter__(self):
+        rng = np.random.default_rng(self.seed)
+        tickers, prices = self.tickers, list(self.prices)
+        interval = (
+            self.batch_size / self.ticks_per_second if self.ticks_per_second else 0
+        )
+        next_batch = time.monotonic()
+        while not self._closed.is_set():
+            slots = rng.integers(len(tickers), size=self.batch_size).tolist()
+            steps = np.exp(rng.normal(0.0, self.volatility, self.batch_size)).tolist()
+            ticks = []
+            for slot, step in zip(slots, steps):
+                prices[slot] *= step
+                ticks.append((tickers[slot], prices[slot]))
+            yield ticks
+            if interval:
+                next_batch += interval
+                time.sleep(max(0.0, next_batch - time.monotonic()))
+
+
+class PolygonFeed(QuoteFeed):
+    """
+    Polygon real-time trades (`T.<ticker>`) over its websocket. Messages
+    arrive on the client's thread and are handed over, one batch per message,
+    through a bounded queue; batches are dropped, with a warning, rather than
+    letting a slow consumer hold up the socket.
+    """
+
+    def __init__(
+        self,
+        polygon_key: str,
+        tickers: list,
+        cluster: str = "stocks",
+        host: str = "socket.polygon.io",
+        max_batches: int = 10_000,
+    ):
+        super().__init__()
+        self.polygon_key = polygon_key
+        self.tickers = list(tickers)
+        self.cluster = cluster
+        self.host = host
+        self._batches = queue.Queue(maxsize=max_batches)
+        self._client = None
+
+    def _on_message(self, _ws, message):
+        ticks = [
+            (event["sym"], event["p"])
+            for event in json.loads(message)
+            if event.get("ev") == "T"
+        ]
+        if ticks:
+            try:
+                self._batches.put_nowait(ticks)
+            except queue.Full:
+                log.warning(f"Quote feed falling behind, dropped {len(ticks)} trades.")
+
+    def _on_close(self, _ws, close_code, message):
+        log.info(f"Polygon stream closed: {close_code} {message}")
+        self._closed.set()
+
+    def _on_error(self, _ws, error, *args):
+        log.error(f"Polygon stream error: {error}")
+
+    def __iter__(self):
+        from polygon import StreamClient
+
+        self._client = StreamClient(
+            self.polygon_key,
+            self.cluster,
+            host=self.host,
+            on_message=self._on_message,
+            on_close=self._on_close,
+            on_error=self._on_error,
+        )
+        self._client.start_stream_thread()
+        self._client.subscribe_stock_trades(self.tickers)
+        log.info(f"Subscribed to Polygon trades of {len(self.tickers)} tickers")
+        while not self._closed.is_set():
+            try:
+                yield self._batches.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def close(self):
+        super().close()
+        if self._client is not None:
+            self._client.close_stream()
+
+
+def quote_feed(
+    kind: str, tickers: list, prices: list, polygon_key: str = None
+) -> QuoteFeed:
+    """The `kind` of feed, simulated or polygon, for `tickers` last traded at `prices`."""
+    if kind == FEED_POLYGON:
+        return PolygonFeed(polygon_key, tickers)
+    if kind == FEED_SIMULATED:
+        return SimulatedFeed(tickers, prices)
+    raise ValueError(f"Unknown quote feed: {kind}")
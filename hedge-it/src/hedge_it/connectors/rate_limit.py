@@ -0,0 +1,220 @@
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from hedge_it.commons import get_logger
+from hedge_it.commons.constants import YAHOO_LIMITER_DB
+
+log = get_logger()
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket for coroutines sharing one API budget.
+
+    `rate` tokens are refilled evenly over `period` seconds and at most
+    `capacity` (defaults to `rate`) can be held, so a burst never exceeds the
+    plan limit.
+    """
+
+    def __init__(self, rate: int, period: float = 60.0, capacity: int = None):
+        self.rate = rate
+        self.period = period
+        self.capacity = capacity or rate
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def _refill_per_second(self) -> float:
+        return self.rate / self.period
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated_at) * self._refill_per_second,
+        )
+        self._updated_at = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._refill_per_second)
+                self._refill()
+            self._tokens -= 1
+
+
+class RateLimited(Exception):
+    """A call was still throttled after the limiter's retries."""
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose rate adapts to what the upstream sustains (AIMD).
+
+    Each successful call adds `increase / rate` requests per second, so the
+    rate climbs by about `increase` per second of traffic up to `max_rate`; a
+    throttled call, or one slower than `slow_seconds`, multiplies it by
+    `decrease`. A throttled call also blocks the bucket for an exponential
+    backoff with jitter, doubling per consecutive throttle up to `max_backoff`
+    seconds. The bucket lives in the SQLite file at `path`, so every thread
+    and process using it shares one budget for the IP.
+    """
+
+    def __init__(
+        self,
+        path: str = YAHOO_LIMITER_DB,
+        name: str = "yahoo",
+        max_rate: float = 10.0,
+        min_rate: float = 0.2,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        slow_seconds: float = 5.0,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        max_retries: int = 4,
+    ):
+        self.path = path
+        self.name = name
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_seconds = slow_seconds
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits (name TEXT PRIMARY KEY, rate REAL, tokens REAL, updated_at REAL, blocked_until REAL, strikes INTEGER)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO rate_limits VALUES (?, ?, 1, ?, 0, 0)",
+                (name, max(self.min_rate, max_rate / 4), time.time()),
+            )
+            # A persisted rate above a lowered ceiling is capped right away.
+            conn.execute(
+                "UPDATE rate_limits SET rate = MIN(rate, ?) WHERE name = ?",
+                (max_rate, name),
+            )
+
+    @contextmanager
+    def _transaction(self):
+        if (conn := getattr(self._local, "conn", None)) is None:
+            conn = self._local.conn = sqlite3.connect(
+                self.path, timeout=60, isolation_level=None
+            )
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @property
+    def rate(self) -> float:
+        with self._transaction() as conn:
+            return conn.execute(
+                "SELECT rate FROM rate_limits WHERE name = ?", (self.name,)
+            ).fetchone()[0]
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self._transaction() as conn:
+                rate, tokens, updated_at, blocked_until = conn.execute(
+                    "SELECT rate, tokens, updated_at, blocked_until FROM rate_limits WHERE name = ?",
+                    (self.name,),
+                ).fetchone()
+                now = time.time()
+                tokens = min(max(rate, 1.0), tokens + (now - updated_at) * rate)
+                if now < blocked_until:
+                    wait = blocked_until - now
+                elif tokens >= 1:
+                    tokens, wait = tokens - 1, 0
+                else:
+                    wait = (1 - tokens) / rate
+                conn.execute(
+                    "UPDATE rate_limits SET tokens = ?, updated_at = ? WHERE name = ?",
+                    (tokens, now, self.name),
+                )
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def _adjust(self, throttled: bool, seconds: float):
+        with self._transaction() as conn:
+            rate, strikes, blocked_until = conn.execute(
+                "SELECT rate, strikes, blocked_until FROM rate_limits WHERE name = ?",
+                (self.name,),
+            ).fetchone()
+            if throttled:
+                strikes += 1
+                backoff = min(self.max_backoff, self.base_backoff * 2**strikes)
+                blocked_until = max(
+                    blocked_until, time.time() + backoff * random.uniform(0.5, 1.0)
+                )
+                rate = max(self.min_rate, rate * self.decrease)
+                log.warning(
+                    f"Rate limiter {self.name} throttled, rate: {rate:.2f}/s, backoff: {backoff:.0f}s"
+                )
+            elif seconds > self.slow_seconds:
+                rate = max(self.min_rate, rate * self.decrease)
+            else:
+                strikes = 0
+                rate = min(self.max_rate, rate + self.increase / rate)
+            conn.execute(
+                "UPDATE rate_limits SET rate = ?, strikes = ?, blocked_until = ? WHERE name = ?",
+                (rate, strikes, blocked_until, self.name),
+            )
+
+    def call(self, func, *args, is_throttled=None, throttle_errors=(), **kwargs):
+        """
+        `func(*args, **kwargs)` under the limiter, retried while throttled.
+
+        A call is throttled when it raises one of `throttle_errors` or its
+        result satisfies `is_throttled`. Raises `RateLimited` once the retries
+        are used up, so the caller can queue the work for later.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+                throttled = bool(is_throttled and is_throttled(result))
+            except throttle_errors:
+                throttled = True
+            self._adjust(throttled, time.monotonic() - started)
+            if not throttled:
+                return result
+        raise RateLimited(f"{self.name} still throttled after {attempt} retries")
+
+
+_yahoo_limiter = None
+_yahoo_limiter_lock = threading.Lock()
+
+
+def configure_yahoo_limiter(
+    max_rate: float = 10.0, path: str = YAHOO_LIMITER_DB
+) -> AdaptiveRateLimiter:
+    """Set up the limiter shared by every Yahoo call, `max_rate` requests per second at most."""
+    global _yahoo_limiter
+    with _yahoo_limiter_lock:
+        _yahoo_limiter = AdaptiveRateLimiter(path, max_rate=max_rate)
+    log.info(f"Yahoo rate limiter: {path}, max {max_rate}/s")
+    return _yahoo_limiter
+
+
+def yahoo_limiter() -> AdaptiveRateLimiter:
+    global _yahoo_limiter
+    with _yahoo_limiter_lock:
+        if _yahoo_limiter is None:
+            _yahoo_limiter = AdaptiveRateLimiter()
+    return _yahoo_limiter
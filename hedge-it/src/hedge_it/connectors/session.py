@@ -1,14 +1,109 @@
-from pyrate_limiter import Duration, Limiter, RequestRate
-from requests import Session
-from requests_cache import CacheMixin, SQLiteCache
-from requests_ratelimiter import LimiterMixin, MemoryQueueBucket
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
 
+from curl_cffi import requests as curl_requests
 
-class CachedLimiterSession(CacheMixin, LimiterMixin, Session):
-    pass
+from hedge_it.commons.utils.instrumentation import record_http_response
 
-session = CachedLimiterSession(
-    limiter=Limiter(RequestRate(100, Duration.SECOND)),
-    bucket_class=MemoryQueueBucket,
-    backend=SQLiteCache("yfinance.cache"),
-)
\ No newline at end of file
+CACHE_FILE = "yfinance.cache"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class CachedCurlSession(curl_requests.Session):
+    """
+    curl_cffi session with a SQLite response cache.
+
+    yfinance only accepts curl_cffi sessions, which requests-cache cannot wrap,
+    so successful GETs of Yahoo data endpoints are cached here instead, keyed
+    by URL and parameters without the crumb, for `expire_after` seconds.
+    Cookie and crumb requests are never cached. Every response is counted by
+    the instrumentation, with `from_cache` set.
+    """
+
+    def __init__(
+        self, cache_file: str = CACHE_FILE, expire_after: int = 3600, **kwargs
+    ):
+        super().__init__(impersonate="chrome", **kwargs)
+        self.cache_file = cache_file
+        self.expire_after = expire_after
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, "
+                "content BLOB, expires_at REAL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.cache_file, timeout=30)
+
+    @staticmethod
+    def _cache_key(method: str, url: str, params) -> str:
+        if method.upper() != "GET" or "finance.yahoo.com" not in urlsplit(url).netloc:
+            return None
+        if "crumb" in urlsplit(url).path:
+            return None
+        params = sorted((k, str(v)) for k, v in dict(params or {}).items())
+        return f"{url}?{urlencode([(k, v) for k, v in params if k != 'crumb'])}"
+
+    def _cached(self, key: str):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT url, status, headers, content FROM responses "
+                "WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        response = curl_requests.Response()
+        response.url, response.status_code = row[0], row[1]
+        response.headers = curl_requests.Headers(json.loads(row[2]))
+        response.content = row[3]
+        return response
+
+    def _store(self, key: str, response):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    str(response.url),
+                    response.status_code,
+                    json.dumps(dict(response.headers.items())),
+                    response.content,
+                    time.time() + self.expire_after,
+                ),
+            )
+
+    def request(self, method, url, params=None, **kwargs):
+        key = self._cache_key(method, url, params)
+        response = self._cached(key) if key else None
+        if response is not None:
+            response.from_cache = True
+        else:
+            response = super().request(method, url, params=params, **kwargs)
+            response.from_cache = False
+            if key and response.status_code == 200:
+                self._store(key, response)
+        return record_http_response(response)
+
+
+def __getattr__(name):
+    """
+    Create `session` on first access (PEP 562), not when the module is imported.
+
+    Requests are not rate limited here, callers go through the adaptive
+    limiter in `rate_limit`.
+    """
+    global _session
+    if name != "session":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _session_lock:
+        if _session is None:
+            _session = CachedCurlSession()
+    return _session
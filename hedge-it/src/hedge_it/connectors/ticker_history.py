@@ -1,9 +1,13 @@
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
+from itertools import repeat
+
 import pandas as pd
-import yfinance as yf
 
-from hedge_it.commons import get_logger
+from hedge_it.commons import chunked_iterable, get_logger
 from hedge_it.commons.constants import (
-    CS,
     DISPLAY_NAME,
     INDUSTRY,
     SECTOR,
@@ -11,53 +15,19 @@ from hedge_it.commons.constants import (
     TICKER,
 )
 
-from .session import session
-
-log = get_logger()
+from hedge_it.processor.chart_parser import parse_chart_batch, read_chart_batches
 
+from .data_source import data_source
+from .rate_limit import RateLimited
 
-def ticker_by_exchange(poly_ref_client, *exchanges):
-    tickers = []
-    api_call_count = 0
-    for exchange in exchanges:
-        log.info(f"Getting tickers for exchange {exchange}")
-        url = None
-        while True:
-            api_call_count += 1
-            if api_call_count > 5:
-                log.info(
-                    f"Warning: API call count has exceeded 5 Free Polygon has limit of 5 Calls Per Minute. Current count: {api_call_count}"
-                )
-
-            response = (
-                poly_ref_client.get_page_by_url(url)
-                if url
-                else poly_ref_client.get_tickers(
-                    market="stocks", active=True, symbol_type=CS, exchange=exchange
-                )
-            )
-            log.info(
-                f"Response Status: {response.get('status')},Count :{response.get('count')} Next URL: {response.get('next_url')}"
-            )
-            if response.get('status') == 'ERROR':
-                log.error(f"Error fetching tickers for exchange {exchange}: {response.get('error')}")
-            filtered_tickers = [
-                i
-                for i in response.get("results", [])
-                if i["primary_exchange"] == exchange
-            ]
-            log.info(f"Filtered tickers count: {len(filtered_tickers)}")
-            tickers.extend(filtered_tickers)
-            if not (url := response.get("next_url")):
-                break
-    return tickers
+log = get_logger()
 
 
 def ticker_outstanding_shares(ticker) -> pd.DataFrame:
     """Fetch shares outstanding for a single ticker."""
     stock_info = {}
     try:
-        ticker_info = yf.Ticker(ticker).info
+        ticker_info = data_source().ticker_info(ticker)
         if not ticker_info or not isinstance(ticker_info, dict):
             log.warning(f"No Ticker info found for: `{ticker}`.")
             return pd.DataFrame()
@@ -68,25 +38,190 @@ def ticker_outstanding_shares(ticker) -> pd.DataFrame:
         stock_info[DISPLAY_NAME] = ticker_info["displayName"]
         stock_info[TICKER] = ticker
 
+    except RateLimited:
+        raise
     except Exception as e:
         log.error(f"Error fetching shares outstanding for ticker {ticker}: {e}")
     return stock_info
 
 
-def _fetch_ticker_history(ticker_batch, period) -> pd.DataFrame:
-    """Fetch history for a single ticker."""
-    tickers = yf.Tickers(ticker_batch, session=session)
-    historical_data: pd.DataFrame = tickers.history(period=period, timeout=20)
-    return historical_data
+def map_with_retry_queue(func, items: list, max_workers: int = 8, rounds: int = 3):
+    """`func` over `items` on `max_workers` threads, results in `items` order.
+
+    Items whose call gave up with `RateLimited` are queued and run again in a
+    later round, once the limiter's backoff has passed, instead of dropped.
+    """
+    results, queue = {}, list(items)
+    for round_number in range(1, rounds + 1):
+        throttled = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(func, item): item for item in queue}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except RateLimited:
+                    throttled.append(futures[future])
+        if not throttled:
+            break
+        log.warning(
+            f"{len(throttled)} calls throttled in round {round_number}, requeued."
+        )
+        queue = throttled
+    else:
+        log.error(f"Giving up on {len(throttled)} throttled calls: {throttled}")
+    return [results[item] for item in items if item in results]
+
 
+def _ticker_history(ticker, period, start=None) -> tuple:
+    """(ticker, history) with a tz-naive index, the history empty on failure.
 
-def fetch_ticker_history(ticker_batch, period="30d"):
+    Tickers are requested one by one, live through `yf.Ticker` instead of
+    `yf.Tickers.history`, which goes through `yf.download` and its module level
+    result buffers that are not safe to share between concurrent calls.
+    `RateLimited` is raised for the retry queue to requeue the ticker.
+    """
     try:
-        log.info(f"Count of ticker data to be fetched:{len(ticker_batch)}.")
-        data = _fetch_ticker_history(ticker_batch, period)
-        if data.empty:
-            log.warning(f"No data returned for ticker batch: {ticker_batch}")
-        return data
+        history = data_source().ticker_history(ticker, period=period, start=start)
+    except RateLimited:
+        raise
     except Exception as e:
-        log.error(f"Error fetching data for ticker batch {ticker_batch}: {e}")
+        log.error(f"Error fetching history for ticker {ticker}: {e}")
+        return ticker, pd.DataFrame()
+    if not history.empty:
+        history.index = history.index.tz_localize(None)
+    return ticker, history
+
+
+def fetch_ticker_history(
+    ticker_batch,
+    period="30d",
+    start=None,
+    max_workers: int = 8,
+    rounds: int = 3,
+):
+    """Download history ticker by ticker on a bounded worker pool.
+
+    All workers share the cached `session` and the Yahoo limiter, so the pool
+    only bounds the number of in-flight requests. Tickers still throttled after
+    the limiter's retries are requeued, on their own, for up to `rounds`
+    passes; the rest of the batch is kept.
+    """
+    log.info(f"Count of ticker data to be fetched:{len(ticker_batch)}, start: {start}.")
+    frames = {
+        ticker: history
+        for ticker, history in map_with_retry_queue(
+            partial(_ticker_history, period=period, start=start),
+            list(ticker_batch),
+            max_workers,
+            rounds,
+        )
+        if not history.empty
+    }
+    if not frames:
+        log.error("No history fetched for any ticker.")
         return None
+    return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+
+def fetch_incremental_history(
+    ticker_batch,
+    latest_dates: dict,
+    default_start=None,
+    max_workers: int = 8,
+):
+    """Fetch only the trading days missing from the store.
+
+    Tickers are grouped by their last persisted date so that each group needs a
+    single history call starting at that date (inclusive, to refresh a partial
+    bar). Tickers without persisted history start at `default_start`.
+    """
+    groups = defaultdict(list)
+    for ticker in ticker_batch:
+        groups[latest_dates.get(ticker, default_start)].append(ticker)
+
+    frames = []
+    for start, tickers in groups.items():
+        data = fetch_ticker_history(
+            tickers,
+            start=start,
+            max_workers=max_workers,
+        )
+        if data is not None and not data.empty:
+            frames.append(data)
+    if not frames:
+        log.warning("No incremental history fetched.")
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1)
+
+
+def _fetch_chart_batch(ticker_batch, starts: dict, default_start) -> tuple:
+    """
+    Raw chart payloads of a batch as (ticker, payload), skipping failures,
+    and the tickers still throttled after the limiter's retries.
+    """
+    payloads, throttled = [], []
+    for ticker in ticker_batch:
+        try:
+            payload = data_source().ticker_chart(
+                ticker, starts.get(ticker, default_start)
+            )
+        except RateLimited:
+            throttled.append(ticker)
+            continue
+        except Exception as e:
+            log.error(f"Error fetching chart for ticker {ticker}: {e}")
+            continue
+        if payload:
+            payloads.append((ticker, payload))
+    return payloads, throttled
+
+
+def fetch_chart_history(
+    ticker_batch,
+    latest_dates: dict = None,
+    default_start=None,
+    chunk_size: int = 50,
+    max_workers: int = 8,
+    parse_workers: int = None,
+    rounds: int = 3,
+) -> pd.DataFrame:
+    """Download raw chart JSON on threads and parse it on `parse_workers` processes.
+
+    Each downloaded batch is handed to the process pool as soon as it arrives,
+    so parsing overlaps with the remaining downloads and is not serialized on
+    the GIL. Workers return Arrow IPC buffers of long (Date, Ticker, OHLCV)
+    rows, i.e. the frame `process_ticker_data` builds, without a wide frame
+    in between. Tickers start at their `latest_dates` entry, else at
+    `default_start`. Workers are spawned, not forked, since the parent runs
+    download, metrics and DuckDB threads. Tickers still throttled after the
+    limiter's retries are queued for up to `rounds` passes.
+    """
+    log.info(
+        f"Count of ticker charts to be fetched:{len(ticker_batch)}, parse workers: {parse_workers}."
+    )
+    queue, parsed = list(ticker_batch), []
+    with ThreadPoolExecutor(max_workers=max_workers) as fetchers, ProcessPoolExecutor(
+        max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as parsers:
+        for round_number in range(1, rounds + 1):
+            throttled = []
+            for payloads, batch_throttled in fetchers.map(
+                _fetch_chart_batch,
+                chunked_iterable(queue, chunk_size),
+                repeat(latest_dates or {}),
+                repeat(default_start),
+            ):
+                throttled += batch_throttled
+                if payloads:
+                    parsed.append(parsers.submit(parse_chart_batch, payloads))
+            if not throttled:
+                break
+            log.warning(
+                f"{len(throttled)} charts throttled in round {round_number}, requeued."
+            )
+            queue = throttled
+        else:
+            log.error(f"Giving up on {len(throttled)} throttled charts: {throttled}")
+        ticker_df = read_chart_batches([future.result() for future in parsed])
+    log.info(f"Ticker charts parsed: {ticker_df.shape}")
+    return ticker_df
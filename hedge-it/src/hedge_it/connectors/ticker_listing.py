@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+
+from polygon import ReferenceClient
+
+from hedge_it.commons import get_logger
+from hedge_it.commons.constants import CS
+
+from .rate_limit import AsyncTokenBucket
+
+log = get_logger()
+
+TICKER_CACHE_FILE = "polygon_tickers.json"
+
+
+async def _exchange_tickers(client, bucket: AsyncTokenBucket, exchange: str) -> list:
+    """Walk the `next_url` pages of one exchange, one rate limited call per page."""
+    tickers = []
+    url = None
+    while True:
+        await bucket.acquire()
+        response = (
+            await client.get_page_by_url(url)
+            if url
+            else await client.get_tickers(
+                market="stocks", active=True, symbol_type=CS, exchange=exchange
+            )
+        )
+        log.info(
+            f"Exchange: {exchange}, Response Status: {response.get('status')},Count :{response.get('count')} Next URL: {response.get('next_url')}"
+        )
+        if response.get("status") == "ERROR":
+            raise RuntimeError(
+                f"Error fetching tickers for exchange {exchange}: {response.get('error')}"
+            )
+        tickers.extend(
+            i for i in response.get("results", []) if i["primary_exchange"] == exchange
+        )
+        if not (url := response.get("next_url")):
+            break
+    log.info(f"Filtered tickers count for {exchange}: {len(tickers)}")
+    return tickers
+
+
+async def _list_tickers(
+    polygon_key: str, exchanges: list, calls_per_minute: int
+) -> dict:
+    bucket = AsyncTokenBucket(calls_per_minute, period=60)
+    client = ReferenceClient(
+        polygon_key, use_async=True, max_connections=len(exchanges)
+    )
+    async with client:
+        results = await asyncio.gather(
+            *(_exchange_tickers(client, bucket, exchange) for exchange in exchanges)
+        )
+    return dict(zip(exchanges, results))
+
+
+def _read_cache(cache_file: str, exchanges: list, ttl_hours: float) -> dict:
+    if not os.path.exists(cache_file):
+        return {}
+    with open(cache_file) as f:
+        cache = json.load(f)
+    expires_after = timedelta(hours=ttl_hours)
+    return {
+        exchange: entry["tickers"]
+        for exchange, entry in cache.items()
+        if exchange in exchanges
+        and datetime.utcnow() - datetime.fromisoformat(entry["fetched_at"])
+        < expires_after
+    }
+
+
+def _write_cache(cache_file: str, listing: dict):
+    cache = {}
+    if os.path.exists(cache_file):
+        with open(cache_file) as f:
+            cache = json.load(f)
+    fetched_at = datetime.utcnow().isoformat()
+    for exchange, tickers in listing.items():
+        cache[exchange] = {"fetched_at": fetched_at, "tickers": tickers}
+    tmp_file = f"{cache_file}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_file, cache_file)
+
+
+def ticker_by_exchange(
+    polygon_key: str,
+    *exchanges,
+    calls_per_minute: int = 5,
+    cache_ttl_hours: float = 24,
+    cache_file: str = TICKER_CACHE_FILE,
+) -> list:
+    """Active common stock tickers listed on `exchanges`.
+
+    Exchanges are paged concurrently over one pooled async client, sharing a
+    token bucket sized to the Polygon plan (`calls_per_minute`, 5 on the free
+    tier). Listings are cached on disk per exchange for `cache_ttl_hours`.
+    """
+    listing = _read_cache(cache_file, exchanges, cache_ttl_hours)
+    if missing := [e for e in exchanges if e not in listing]:
+        log.info(f"Getting tickers for exchanges {missing}, cached: {list(listing)}")
+        fetched = asyncio.run(_list_tickers(polygon_key, missing, calls_per_minute))
+        _write_cache(cache_file, fetched)
+        listing.update(fetched)
+    return [ticker for exchange in exchanges for ticker in listing[exchange]]
@@ -1,13 +1,22 @@
+import io
+
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 import streamlit as st
 from fpdf import FPDF
 
 from hedge_it.commons import get_logger
+from hedge_it.processor.duck_db import stock_history_batches
 
 log = get_logger()
 
+PDF = "pdf"
+CSV = "csv"
+PARQUET = "parquet"
+
 
-def generate_pdf(dataframe, filename="stock_composition.pdf"):
-    log.info(f"Generating PDF: {filename}")
+def generate_pdf(dataframe) -> bytes:
+    log.info(f"Generating PDF for {len(dataframe)} rows")
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", size=12)
@@ -20,39 +29,77 @@ def generate_pdf(dataframe, filename="stock_composition.pdf"):
     pdf.ln()
 
     pdf.set_font("Arial", size=10)
-    for _, row in dataframe.iterrows():
+    for row in dataframe.astype(str).itertuples(index=False, name=None):
         for value in row:
-            pdf.cell(40, 10, str(value), border=1, align="C")
+            pdf.cell(40, 10, value, border=1, align="C")
         pdf.ln()
 
-    pdf.output(filename)
-    return filename
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def generate_csv(dataframe) -> bytes:
+    log.info(f"Exporting {len(dataframe)} rows to CSV")
+    return dataframe.to_csv(index=False).encode()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _composition_export(file_format: str, selected_date, data_version: str, _dataframe):
+    """Export of one date's composition, cached per (format, date, data version)."""
+    generate = generate_pdf if file_format == PDF else generate_csv
+    return generate(_dataframe)
 
 
-def download_pdf_button(selected_date_data):
-    pdf_file = generate_pdf(selected_date_data)
-    with open(pdf_file, "rb") as f:
+def _export_button(selected_date_data, selected_date, data_version, file_format, mime):
+    # Only build the file once asked for, not on every rerun.
+    if st.button(f"Prepare {file_format.upper()}", key=f"prepare_{file_format}"):
         st.download_button(
-            label="Download PDF",
-            data=f,
-            file_name="stock_composition.pdf",
-            mime="application/pdf",
+            label=f"Download {file_format.upper()}",
+            data=_composition_export(
+                file_format, selected_date, data_version, selected_date_data
+            ),
+            file_name=f"stock_composition_{selected_date}.{file_format}",
+            mime=mime,
+            on_click="ignore",
         )
 
 
-def generate_csv(dataframe, filename="stock_composition.csv"):
-    log.info(f"Exporting DataFrame to CSV: {filename}")
-    dataframe.to_csv(filename, index=False)
-    log.info(f"CSV export completed: {filename}")
-    return filename
+def download_pdf_button(selected_date_data, selected_date, data_version: str):
+    _export_button(
+        selected_date_data, selected_date, data_version, PDF, "application/pdf"
+    )
+
+
+def download_csv_button(selected_date_data, selected_date, data_version: str):
+    _export_button(selected_date_data, selected_date, data_version, CSV, "text/csv")
+
+
+@st.cache_resource(max_entries=2, show_spinner="Exporting history...")
+def history_export(file_format: str, data_version: str) -> bytes:
+    """
+    Full stock history as CSV or Parquet, built once per data version.
+
+    Rows are streamed from DuckDB as Arrow record batches straight into the
+    file writer, so the history is never materialized as a DataFrame.
+    """
+    log.info(f"Exporting full history to {file_format}, data_version: {data_version}")
+    sink = io.BytesIO()
+    batches = stock_history_batches()
+    writer_class = pq.ParquetWriter if file_format == PARQUET else pa_csv.CSVWriter
+    with writer_class(sink, batches.schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+    return sink.getvalue()
 
 
-def download_csv_button(selected_date_data):
-    csv_file = generate_csv(selected_date_data)
-    with open(csv_file, "rb") as f:
+def download_history_button(data_version: str):
+    file_format = st.radio(
+        "Format", [PARQUET, CSV], horizontal=True, key="history_format"
+    )
+    if st.button("Prepare Full History", key="prepare_history"):
         st.download_button(
-            label="Download CSV",
-            data=f,
-            file_name="stock_composition.csv",
-            mime="text/csv",
+            label=f"Download Full History ({file_format.upper()})",
+            data=history_export(file_format, data_version),
+            file_name=f"stock_history_{data_version}.{file_format}",
+            mime="text/csv" if file_format == CSV else "application/octet-stream",
+            on_click="ignore",
         )
@@ -1,3 +1,7 @@
+import threading
+import time
+from datetime import date, timedelta
+
 import pandas as pd
 import plotly.express as px
 import streamlit as st
@@ -5,82 +9,214 @@ import streamlit as st
 from hedge_it.commons import get_logger
 from hedge_it.commons.constants import (
     CLOSE,
+    CUMULATIVE_RETURN,
+    DAILY_RETURN,
     DATE,
     DISPLAY_NAME,
     EQUAL_WEIGHTED_INDEX,
-    STOCKS,
+    FEED_OFF,
+    INDEX_NAME,
+    LEVEL,
     TABLE_TOPM,
     TICKER,
     VALUE,
 )
-from hedge_it.connectors.fetcher import fetch_stocks
+from hedge_it.connectors.quote_feed import quote_feed
 from hedge_it.dashboards.metrics import (
     day_composition_changes,
     display_percentage_change,
+    display_rolling_metrics,
 )
+from hedge_it.processor.duck_connection import DuckConnectionManager, use_duckdb
 from hedge_it.processor.duck_db import (
     duckconn,
+    get_composition_changes,
     get_stock_composition,
-    persist_index_table,
-    persist_stock_df,
-    persist_top_mcap,
     query_equal_weighted_index,
+    query_index_analytics,
+    query_indices,
+)
+from hedge_it.processor.live_index import (
+    live_index,
+    load_live_index,
+    run_live_index,
+    stop_live_index,
 )
-from hedge_it.processor.ticker_processor import ticker_processor
+from hedge_it.processor.snapshot import latest_snapshot
 
-from .exporter import download_pdf_button
+from .exporter import (
+    download_csv_button,
+    download_history_button,
+    download_pdf_button,
+)
 
 log = get_logger()
 
+_SNAPSHOT_POLL_SECONDS = 5
+
+_snapshot_version = None
+_snapshot_db = None
+_snapshot_lock = threading.Lock()
+_live_lock = threading.Lock()
+_live_version = None
+
 
-def build_data(
-    polygon_key: str,
-    exchanges: list = ["XNYS"],
-    stock_limit: int = 2000,
-    chunk_size: int = 50,
+@st.cache_resource(show_spinner=False)
+def _snapshot_connection(
+    snapshot_db: str, memory_limit: str = None, threads: int = None
+) -> DuckConnectionManager:
+    return DuckConnectionManager(
+        snapshot_db, read_only=True, memory_limit=memory_limit, threads=threads
+    )
+
+
+def invalidate_dashboard_cache(
+    version: str, snapshot_db: str, memory_limit: str = None, threads: int = None
 ):
-    log.info(
-        f"Building Data with stock_limit: {stock_limit}, chunk_size: {chunk_size}, exchanges: {exchanges}"
+    """
+    Drop what was cached for the snapshot `version`, once a newer one is
+    served: its frames, its composition lookup and its connection. Resources
+    of other functions, e.g. the history exports, are left alone.
+    """
+    log.info(f"Invalidating dashboard cache of snapshot {version}")
+    st.cache_data.clear()
+    _composition_by_date.clear(version)
+    _snapshot_connection.clear(snapshot_db, memory_limit, threads)
+
+
+def open_latest_snapshot(memory_limit: str = None, threads: int = None) -> str:
+    """
+    Point the calling session, read-only, at the latest snapshot published by
+    the ingestion worker. Until one exists the page says so and reruns every
+    few seconds.
+
+    Each snapshot gets its own connection, shared by the sessions reading it.
+    Once a newer snapshot is served the older connection is dropped from the
+    cache but not closed, as sessions may still be running on it; DuckDB
+    closes it when the last of them moves on and it is garbage collected.
+    :return: version of the snapshot, the data version of the dashboard
+    """
+    global _snapshot_version, _snapshot_db
+    with _snapshot_lock:
+        version, snapshot_db = latest_snapshot()
+        if version is not None:
+            if version != _snapshot_version:
+                log.info(f"Serving snapshot {version}, previous: {_snapshot_version}")
+                if _snapshot_version is not None:
+                    invalidate_dashboard_cache(
+                        _snapshot_version, _snapshot_db, memory_limit, threads
+                    )
+                _snapshot_version, _snapshot_db = version, snapshot_db
+            manager = _snapshot_connection(snapshot_db, memory_limit, threads)
+    if version is None:
+        st.info("No data published yet, waiting for the first ingestion run.")
+        time.sleep(_SNAPSHOT_POLL_SECONDS)
+        st.rerun()
+    use_duckdb(manager)
+    return version
+
+
+def _load_index(as_of: date, data_version: str) -> tuple:
+    log.info(f"Loading Custom Index. data_version: {data_version}")
+    mcap = duckconn().execute(f"SELECT * FROM {TABLE_TOPM}").fetchdf()
+    return (
+        query_equal_weighted_index(),
+        mcap,
+        get_composition_changes(),
+        query_indices(),
+        query_index_analytics(),
     )
-    if "stocks" in st.session_state:
-        log.info("Stocks Data Already Exists. Reusing")
-        return
-    ticker_stocks, ticker_shares = fetch_stocks(
-        polygon_key, exchanges, stock_limit, chunk_size
+
+
+@st.cache_resource(show_spinner="Loading composition...")
+def _composition_by_date(data_version: str) -> dict:
+    log.info(f"Materializing composition by date. data_version: {data_version}")
+    composition = get_stock_composition()[[DATE, TICKER, DISPLAY_NAME, VALUE, CLOSE]]
+    return {
+        day: frame.drop(columns=DATE).reset_index(drop=True)
+        for day, frame in composition.groupby(DATE, sort=False)
+    }
+
+
+def build_index(data_version: str, cache_ttl: int = 60):
+    """
+    Index, TopMcap, composition change, index variant and index analytics
+    frames shared by all sessions.
+
+    Cached per (as-of date, data version), so a newly published snapshot is
+    picked up on the next rerun. What is indexed is decided at ingestion.
+    """
+    load_index = st.cache_data(
+        ttl=timedelta(minutes=cache_ttl), show_spinner="Building index..."
+    )(_load_index)
+    return load_index(
+        date.today(),
+        data_version,
     )
-    stocks_df = ticker_processor(ticker_stocks, ticker_shares)
-    persist_stock_df(stocks_df)
-    st.session_state["stocks"] = True
 
 
-def build_index(top_n: int = 100, stock_table_name: str = STOCKS):
-    if "mcap" not in st.session_state:
-        log.info("Creating Custom Index.")
-        persist_top_mcap(top_n, stock_table_name)
-        st.session_state["mcap"] = (
-            duckconn().execute(f"SELECT * FROM {TABLE_TOPM}").fetchdf()
-        )
-    else:
-        log.info("Market Cap Info Already Exists. Reusing")
-    if "index" not in st.session_state:
-        persist_index_table()
-        st.session_state["index"] = query_equal_weighted_index()
-    else:
-        log.info("Index Already Exists. Reusing")
-    return st.session_state["index"], st.session_state["mcap"], get_stock_composition()
+def composition_lookup(data_version: str) -> dict:
+    """
+    Index constituents per date, materialized once per data version and
+    dropped once a newer version is served.
+
+    Held as a shared resource (not copied per rerun like cached data), so a
+    date change is a dict lookup of that day's constituents. The frames are
+    shared by all sessions and must not be modified.
+    """
+    return _composition_by_date(data_version)
+
+
+def follow_live_index(data_version: str, feed: str, polygon_key: str = None):
+    """
+    Run the intraday index on `feed`, one per process shared by all sessions,
+    restarted from the new last close once a new data version is served.
+    """
+    global _live_version
+    with _live_lock:
+        if data_version == _live_version:
+            return
+        live = load_live_index()
+        if live is None:
+            stop_live_index()
+        else:
+            run_live_index(
+                live, quote_feed(feed, live.tickers, live.prices.tolist(), polygon_key)
+            )
+        _live_version = data_version
+
+
+@st.fragment(run_every=timedelta(seconds=1))
+def intraday_index():
+    """Reruns on its own every second, the rest of the page is left as is."""
+    live = live_index()
+    if live is None:
+        st.write("No intraday index yet, waiting for the first index build.")
+        return
+    change = (live.level / live.close_level - 1) * 100
+    st.metric(label="Intraday Level", value=f"{live.level:.2f}", delta=f"{change:.2f}%")
+    st.caption(f"{live.ticks} trades of {len(live.tickers)} constituents applied.")
+    history = live.history()
+    if not history.empty:
+        st.line_chart(history.set_index(DATE)[EQUAL_WEIGHTED_INDEX])
 
 
 def calculate_cumulative_returns(data: pd.DataFrame, value_column: str) -> float:
-    initial_value = data[value_column].iloc[0]
-    final_value = data[value_column].iloc[-1]
-    cumulative_return = ((final_value - initial_value) / initial_value) * 100
+    cumulative_return = data[value_column].iloc[-1]
     st.metric(label="Cumulative Returns", value=f"{cumulative_return:.2f}%")
 
 
-def plot(poly_key: str):
+def plot(
+    data_version: str,
+    cache_ttl: int = 60,
+    live_feed: str = FEED_OFF,
+    polygon_key: str = None,
+):
     st.title("Equal-Weighted Index Dashboard")
-    build_data(poly_key)
-    index, mcap, composition = build_index()
+    index, mcap, changes, indices, analytics = build_index(
+        data_version,
+        cache_ttl=cache_ttl,
+    )
     mcap
     fig = px.line(
         index,
@@ -90,21 +226,45 @@ def plot(poly_key: str):
     )
     st.plotly_chart(fig)
 
+    if live_feed != FEED_OFF:
+        st.subheader("Intraday")
+        follow_live_index(data_version, live_feed, polygon_key)
+        intraday_index()
+
     st.subheader("Stock Composition on a Selected Date")
     selected_date = st.date_input("Select a Date", value=index[DATE].min())
-    selected_date_data = composition[
-        composition[DATE] == pd.Timestamp(selected_date)
-    ].reset_index(drop=True)
+    selected_date_data = composition_lookup(data_version).get(
+        pd.Timestamp(selected_date), pd.DataFrame()
+    )
 
     if not selected_date_data.empty:
         st.write(f"Stock Composition for {selected_date}:")
-        st.dataframe(selected_date_data[[TICKER, DISPLAY_NAME, VALUE, CLOSE]])
+        st.dataframe(selected_date_data)
+        download_pdf_button(selected_date_data, selected_date, data_version)
+        download_csv_button(selected_date_data, selected_date, data_version)
     else:
         st.write("No data available for the selected date.")
 
-    download_pdf_button(selected_date_data)
-
     st.subheader("Summary Metrics")
-    calculate_cumulative_returns(index, EQUAL_WEIGHTED_INDEX)
-    display_percentage_change(index, DATE, EQUAL_WEIGHTED_INDEX)
-    day_composition_changes(mcap)
+    if not analytics.empty:
+        calculate_cumulative_returns(analytics, CUMULATIVE_RETURN)
+        display_rolling_metrics(analytics)
+        display_percentage_change(analytics, DATE, DAILY_RETURN)
+    day_composition_changes(changes)
+
+    if not indices.empty:
+        st.subheader("Index Variants")
+        index_names = indices[INDEX_NAME].unique().tolist()
+        selected = st.multiselect("Indices", index_names, default=index_names[:3])
+        st.plotly_chart(
+            px.line(
+                indices[indices[INDEX_NAME].isin(selected)],
+                x=DATE,
+                y=LEVEL,
+                color=INDEX_NAME,
+                title="Index Variants Over Time",
+            )
+        )
+
+    st.subheader("Full History")
+    download_history_button(data_version)
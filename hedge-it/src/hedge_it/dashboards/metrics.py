@@ -1,28 +1,43 @@
 import pandas as pd
 import streamlit as st
 
-from hedge_it.commons.constants import DATE, TICKER
+from hedge_it.commons.constants import (
+    DRAWDOWN,
+    MONTHLY_RETURN,
+    ROLLING_VOLATILITY,
+    TURNOVER,
+    WEEKLY_RETURN,
+)
 
 
 def display_percentage_change(data: pd.DataFrame, date_column: str, value_column: str):
-    data = data.sort_values(by=date_column)
-    data["Daily % Change"] = data[value_column].pct_change() * 100
-
-    latest_change = data["Daily % Change"].iloc[-1]
+    """Latest and per date % changes, precomputed in `value_column`."""
+    latest_change = data[value_column].iloc[-1]
     st.metric(
         label="Daily Percentage Change",
         value=f"{latest_change:.2f}%",
         delta=f"{latest_change:.2f}%",
     )
     st.write("Daily Percentage Changes")
-    st.bar_chart(data.set_index(date_column)["Daily % Change"])
+    st.bar_chart(data.set_index(date_column)[value_column])
+
+
+def display_rolling_metrics(analytics: pd.DataFrame):
+    """Latest trailing returns, drawdown, volatility and turnover of the index."""
+    latest = analytics.iloc[-1]
+    metrics = {
+        "Weekly Return": WEEKLY_RETURN,
+        "Monthly Return": MONTHLY_RETURN,
+        "Drawdown": DRAWDOWN,
+        "Rolling Volatility": ROLLING_VOLATILITY,
+        "Turnover": TURNOVER,
+    }
+    for column, (label, value_column) in zip(st.columns(len(metrics)), metrics.items()):
+        value = latest[value_column]
+        column.metric(label=label, value="-" if pd.isna(value) else f"{value:.2f}%")
 
 
-def day_composition_changes(mcap: pd.DataFrame):
-    df = mcap.sort_values(by=DATE)
-    df["Tickers_Set"] = df.groupby(DATE)[TICKER].transform(lambda x: tuple(sorted(x)))
-    df["Composition_Changed"] = df["Tickers_Set"] != df["Tickers_Set"].shift()
-    df = df.drop(columns=["Tickers_Set"])
-    df = df[df["Composition_Changed"]].rename(columns={DATE: "Date"})["Date"].unique()
+def day_composition_changes(changes: pd.DataFrame):
+    """Days the index composition changed, with the tickers that entered/exited."""
     st.write("Composition Change Days")
-    st.write(df)
+    st.dataframe(changes, hide_index=True)
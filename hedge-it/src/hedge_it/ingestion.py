@@ -0,0 +1,127 @@
+import threading
+import time
+
+from hedge_it.commons import (
+    CliArguments,
+    CustomLogger,
+    configure_metrics,
+    get_logger,
+    span,
+)
+from hedge_it.commons.constants import DATE, STOCKS
+from hedge_it.connectors.data_source import configure_data_source
+from hedge_it.connectors.fetcher import fetch_stocks
+from hedge_it.connectors.rate_limit import configure_yahoo_limiter
+from hedge_it.processor.duck_connection import configure_duckdb
+from hedge_it.processor.duck_db import (
+    latest_stock_dates,
+    persist_index_analytics,
+    persist_index_table,
+    persist_indices,
+    persist_stock_history,
+    persist_top_mcap,
+)
+from hedge_it.processor.history_store import export_history, history_source
+from hedge_it.processor.snapshot import publish_snapshot
+from hedge_it.processor.ticker_processor import process_ticker_data
+
+log = get_logger()
+
+
+def ingest(cli_args: CliArguments, incremental: bool, top_n: int = 100) -> str:
+    """
+    One ingestion run: fetch and persist stocks, rebuild TopMcap, the index and
+    every registered index variant, then publish a snapshot for the dashboard.
+    :return: version of the published snapshot, None when no history was fetched
+    """
+    latest_dates = latest_stock_dates() if incremental else None
+    ticker_stocks = fetch_stocks(
+        cli_args.polygon_api_key,
+        cli_args.exchanges,
+        int(cli_args.stock_limit),
+        cli_args.chunk_size,
+        latest_dates,
+        cli_args.max_workers,
+        cli_args.fundamentals_ttl,
+        cli_args.polygon_rate_limit,
+        cli_args.lookback,
+        cli_args.parse_workers,
+    )
+    if ticker_stocks.empty:
+        log.warning("No stock history fetched, nothing to ingest.")
+        return None
+    ticker_df = (
+        ticker_stocks if cli_args.parse_workers else process_ticker_data(ticker_stocks)
+    )
+    persist_stock_history(ticker_df, incremental=bool(latest_dates))
+    # New tickers come with history from before the last persisted date, the
+    # derived tables are refreshed from the first date written in this run.
+    since = ticker_df[DATE].min() if latest_dates else None
+
+    stock_table_name = STOCKS
+    if cli_args.history_store:
+        export_history(since=since)
+        stock_table_name = history_source()
+    persist_top_mcap(
+        top_n,
+        stock_table_name,
+        incremental,
+        cli_args.lookback,
+        partitioned=cli_args.history_store,
+        since=since,
+    )
+    persist_index_table(
+        stock_table_name=stock_table_name,
+        incremental=incremental,
+        partitioned=cli_args.history_store,
+        since=since,
+    )
+    persist_index_analytics()
+    persist_indices(
+        stock_table_name=stock_table_name,
+        lookback=cli_args.lookback,
+        partitioned=cli_args.history_store,
+    )
+    return publish_snapshot()
+
+
+def run_ingestion(cli_args: CliArguments, stop: threading.Event = None):
+    """
+    Ingest every `ingest_interval` minutes until `stop` is set, or once when the
+    interval is 0. Runs after the first are incremental; a failed run is logged
+    and the dashboard keeps serving the last published snapshot.
+    """
+    stop = stop or threading.Event()
+    CustomLogger().setLevel(cli_args.log_level)
+    configure_metrics(cli_args.metrics_file, cli_args.metrics_port)
+    configure_data_source(cli_args.data_source, cli_args.fixtures)
+    configure_yahoo_limiter(cli_args.yahoo_rate_limit)
+    configure_duckdb(
+        memory_limit=cli_args.duckdb_memory_limit, threads=cli_args.duckdb_threads
+    )
+    incremental = cli_args.incremental
+    while not stop.is_set():
+        started = time.monotonic()
+        try:
+            with span("ingest"):
+                version = ingest(cli_args, incremental)
+            log.info(
+                f"Ingestion run finished in {time.monotonic() - started:.1f}s, snapshot: {version}"
+            )
+            incremental = True
+        except Exception:
+            log.exception("Ingestion run failed, keeping the last snapshot")
+        if not cli_args.ingest_interval:
+            return
+        stop.wait(
+            max(0.0, cli_args.ingest_interval * 60 - (time.monotonic() - started))
+        )
+
+
+def start_ingestion_thread(cli_args: CliArguments) -> threading.Event:
+    """Run the ingestion scheduler in a daemon thread, set the returned event to stop it."""
+    stop = threading.Event()
+    threading.Thread(
+        target=run_ingestion, args=(cli_args, stop), name="ingestion", daemon=True
+    ).start()
+    return stop
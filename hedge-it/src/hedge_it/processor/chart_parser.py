@@ -0,0 +1,152 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from hedge_it.commons.constants import CLOSE, DATE, HIGH, LOW, OPEN, TICKER, VOLUME
+
+_DAY = 86_400
+
+CHART_SCHEMA = pa.schema(
+    [
+        (DATE, pa.timestamp("ns")),
+        (TICKER, pa.dictionary(pa.int32(), pa.string())),
+        (OPEN, pa.float32()),
+        (CLOSE, pa.float32()),
+        (LOW, pa.float32()),
+        (HIGH, pa.float32()),
+        (VOLUME, pa.int64()),
+    ]
+)
+
+
+def _chart_columns(payload: bytes) -> tuple:
+    """
+    Daily bars of a Yahoo chart payload as (exchange timezone, columns).
+
+    Prices are adjusted by Adj Close / Close like yfinance's `auto_adjust`, and
+    each bar is dated by its day in exchange time. Bars without a Close are
+    dropped; `columns` is None when the payload has no bars.
+    """
+    result = (json.loads(payload).get("chart", {}).get("result") or [None])[0]
+    if not result or not result.get("timestamp"):
+        return None, None
+    meta = result.get("meta", {})
+    quote = result["indicators"]["quote"][0]
+    close = np.array(quote.get(CLOSE.lower()), dtype=np.float64)
+    adjclose = result["indicators"].get("adjclose")
+    ratio = (
+        np.array(adjclose[0]["adjclose"], dtype=np.float64) / close
+        if adjclose
+        else np.ones_like(close)
+    )
+    days = (
+        np.array(result["timestamp"], dtype=np.int64) + meta.get("gmtoffset", 0)
+    ) // _DAY
+    has_close = ~np.isnan(close)
+    columns = {
+        DATE: (days[has_close] * _DAY).astype("datetime64[s]").astype("datetime64[ns]"),
+        **{
+            col: (np.array(quote.get(col.lower()), dtype=np.float64) * ratio)[
+                has_close
+            ].astype(np.float32)
+            for col in [OPEN, CLOSE, LOW, HIGH]
+        },
+        VOLUME: np.nan_to_num(np.array(quote.get(VOLUME.lower()), dtype=np.float64))[
+            has_close
+        ].astype(np.int64),
+    }
+    return meta.get("exchangeTimezoneName"), columns
+
+
+def parse_chart(payload: bytes) -> pd.DataFrame:
+    """One ticker's chart payload as a yfinance style history frame."""
+    timezone, columns = _chart_columns(payload)
+    if columns is None:
+        return pd.DataFrame()
+    history = pd.DataFrame(columns).set_index(DATE)
+    history.index = history.index.tz_localize(timezone or "UTC")
+    return history[[OPEN, HIGH, LOW, CLOSE, VOLUME]]
+
+
+def parse_chart_batch(payloads: list) -> pa.Buffer:
+    """
+    Parse (ticker, payload) pairs into long (Date, Ticker, OHLCV) rows.
+
+    Runs in a worker process; the rows come back as one Arrow IPC stream so the
+    parent maps them without unpickling Python objects.
+    """
+    parsed = {}
+    for ticker, payload in payloads:
+        _, columns = _chart_columns(payload)
+        if columns is not None:
+            parsed[ticker] = columns
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, CHART_SCHEMA) as writer:
+        if parsed:
+            rows = [len(columns[DATE]) for columns in parsed.values()]
+            writer.write_table(
+                pa.table(
+                    {
+                        DATE: np.concatenate([c[DATE] for c in parsed.values()]),
+                        TICKER: pa.DictionaryArray.from_arrays(
+                            np.repeat(np.arange(len(parsed), dtype=np.int32), rows),
+                            pa.array(list(parsed), pa.string()),
+                        ),
+                        **{
+                            col: np.concatenate([c[col] for c in parsed.values()])
+                            for col in [OPEN, CLOSE, LOW, HIGH, VOLUME]
+                        },
+                    },
+                    schema=CHART_SCHEMA,
+                )
+            )
+    return sink.getvalue()
+
+
+def read_chart_batches(buffers: list) -> pd.DataFrame:
+    """Concatenate parsed batches into the long frame `process_ticker_data` returns."""
+    table = pa.concat_tables(
+        [pa.ipc.open_stream(buffer).read_all() for buffer in buffers]
+        or [CHART_SCHEMA.empty_table()]
+    )
+    return table.unify_dictionaries().to_pandas()
+
+
+def chart_payload(ticker: str, history: pd.DataFrame) -> bytes:
+    """
+    A chart payload carrying `history` (a yfinance style frame), as served by
+    Yahoo for already adjusted prices.
+    """
+    index = history.index
+    timezone = str(index.tz) if index.tz is not None else "UTC"
+    days = index.tz_localize(None).normalize() if index.tz is not None else index
+    return json.dumps(
+        {
+            "chart": {
+                "result": [
+                    {
+                        "meta": {
+                            "symbol": ticker,
+                            "gmtoffset": 0,
+                            "exchangeTimezoneName": timezone,
+                        },
+                        "timestamp": (days.asi8 // 10**9).tolist(),
+                        "indicators": {
+                            "quote": [
+                                {
+                                    col.lower(): history[col]
+                                    .astype(float)
+                                    .replace({np.nan: None})
+                                    .tolist()
+                                    for col in [OPEN, HIGH, LOW, CLOSE, VOLUME]
+                                }
+                            ]
+                        },
+                    }
+                ],
+                "error": None,
+            }
+        }
+    ).encode()
@@ -0,0 +1,121 @@
+import threading
+from contextlib import contextmanager
+
+import duckdb
+
+from hedge_it.commons import get_logger
+from hedge_it.commons.constants import STOCKS
+
+log = get_logger()
+
+
+class DuckConnectionManager:
+    """
+    Process wide DuckDB connection.
+
+    The database is opened once; every thread gets its own cursor on that
+    connection (DuckDB cursors are not safe to share between threads) and
+    writes are serialized through a single writer lock.
+    """
+
+    def __init__(
+        self,
+        db: str = STOCKS,
+        read_only: bool = False,
+        memory_limit: str = None,
+        threads: int = None,
+    ):
+        self.db = db
+        self.read_only = read_only
+        self.config = {
+            key: value
+            for key, value in {"memory_limit": memory_limit, "threads": threads}.items()
+            if value
+        }
+        self._connection = None
+        self._open_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+
+    def settings(self) -> tuple:
+        return self.db, self.read_only, self.config
+
+    @property
+    def connection(self) -> duckdb.DuckDBPyConnection:
+        if self._connection is None:
+            with self._open_lock:
+                if self._connection is None:
+                    log.info(
+                        f"Opening {self.db}.duckdb, read_only: {self.read_only}, config: {self.config}"
+                    )
+                    self._connection = duckdb.connect(
+                        f"{self.db}.duckdb",
+                        read_only=self.read_only,
+                        config=self.config,
+                    )
+        return self._connection
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        connection = self.connection
+        if getattr(self._local, "owner", None) is not connection:
+            self._local.cursor = connection.cursor()
+            self._local.owner = connection
+        return self._local.cursor
+
+    @contextmanager
+    def writer(self):
+        if self.read_only:
+            raise PermissionError(f"{self.db}.duckdb is opened read-only.")
+        with self._write_lock:
+            yield self.cursor()
+
+    def close(self):
+        with self._open_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_manager = DuckConnectionManager()
+_scoped = threading.local()
+
+
+def configure_duckdb(
+    db: str = STOCKS,
+    read_only: bool = False,
+    memory_limit: str = None,
+    threads: int = None,
+) -> DuckConnectionManager:
+    """(Re)configure the process wide connection, a no-op for unchanged settings."""
+    global _manager
+    manager = DuckConnectionManager(db, read_only, memory_limit, threads)
+    if manager.settings() != _manager.settings():
+        _manager.close()
+        _manager = manager
+    return _manager
+
+
+def use_duckdb(manager: DuckConnectionManager = None):
+    """
+    Route `duckconn` and `duckwriter` of the calling thread to `manager`, back
+    to the process wide connection when None.
+
+    Lets a thread keep reading one database, e.g. a dashboard session its
+    snapshot, while other threads move on to another, without closing the
+    connection under them.
+    """
+    _scoped.manager = manager
+
+
+def _current() -> DuckConnectionManager:
+    return getattr(_scoped, "manager", None) or _manager
+
+
+def duckconn() -> duckdb.DuckDBPyConnection:
+    """Cursor of the calling thread's connection, the process wide one by default."""
+    return _current().cursor()
+
+
+def duckwriter():
+    """Context manager yielding the calling thread's cursor under the writer lock."""
+    return _current().writer()
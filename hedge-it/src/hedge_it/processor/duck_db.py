@@ -1,56 +1,372 @@
-import duckdb
 import pandas as pd
 
-from hedge_it.commons import get_logger
-from hedge_it.commons.constants import STOCKS, TABLE_TOPM
+from hedge_it.commons import get_logger, timed
+from hedge_it.commons.constants import (
+    CAP_WEIGHT,
+    DATE,
+    INDEX_NAME,
+    LEVEL,
+    REBALANCE_DATE,
+    STOCK_COUNT,
+    STOCKS,
+    TABLE_ANALYTICS,
+    TABLE_FUNDAMENTALS,
+    TABLE_INDEX_MEMBERS,
+    TABLE_INDICES,
+    TABLE_PRICES,
+    TABLE_TOPM,
+    TICKER,
+)
+from hedge_it.processor.duck_connection import duckconn, duckwriter
+from hedge_it.processor.index_engine import divisor_index
+from hedge_it.processor.index_registry import definitions_frame, index_definitions
 from hedge_it.processor.queries import (
-    equal_weighted_index_builder,
+    create_fundamentals_table_ddl,
+    create_index_analytics_ddl,
+    create_index_members_ddl,
+    create_stocks_view_ddl,
+    delete_since_query,
     equal_weighted_index_query,
+    fresh_fundamentals_query,
+    composition_changes_query,
     get_index_stock_composition,
+    index_analytics_query,
+    index_closes_query,
+    index_member_closes_query,
+    index_members_query,
+    index_resume_query,
+    indices_query,
+    latest_dates_query,
+    live_index_seed_query,
+    max_date_query,
+    ranked_stocks_ddl,
+    stock_history_query,
+    stock_prices_query,
     topn_mcap_query,
+    upsert_delete_query,
+    upsert_fundamentals_query,
+    upsert_insert_query,
 )
 
 log = get_logger()
 
 
-def duckconn(db: str = STOCKS):
-    return duckdb.connect(f"{db}.duckdb")
+def table_exists(conn, table_name: str) -> bool:
+    table_exists_query = f"SELECT COUNT(*) FROM information_schema.tables WHERE table_name = '{table_name}'"
+    return conn.execute(table_exists_query).fetchone()[0] > 0
+
+
+def column_exists(conn, table_name: str, column_name: str) -> bool:
+    column_exists_query = f"SELECT COUNT(*) FROM information_schema.columns WHERE table_name = '{table_name}' AND column_name = '{column_name}'"
+    return conn.execute(column_exists_query).fetchone()[0] > 0
 
 
-def persist_stock_df(stock_df: pd.DataFrame, table_name: str = STOCKS):
+def latest_stock_dates(table_name: str = STOCKS) -> dict:
+    """Last persisted trading day per ticker, empty when nothing is persisted yet."""
     conn = duckconn()
-    conn.register("stocks", stock_df)
+    if not table_exists(conn, table_name):
+        return {}
+    return dict(conn.execute(latest_dates_query(table_name)).fetchall())
+
+
+def _merge_stocks(conn, delta_name: str, table_name: str = STOCKS):
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.execute(upsert_delete_query(delta_name, table_name))
+        conn.execute(upsert_insert_query(delta_name, table_name))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _migrate_stocks_table(
+    conn, table_name: str = STOCKS, prices_table: str = TABLE_PRICES
+):
+    """Move the prices of a legacy wide `table_name` table into `prices_table`."""
+    legacy_table = conn.execute(
+        f"SELECT COUNT(*) FROM information_schema.tables WHERE table_name = '{table_name}' AND table_type = 'BASE TABLE'"
+    ).fetchone()[0]
+    if legacy_table:
+        log.info(f"Migrating {table_name} prices to {prices_table}")
+        if not table_exists(conn, prices_table):
+            conn.execute(
+                f"CREATE TABLE {prices_table} AS {stock_prices_query(table_name)}"
+            )
+        conn.execute(f"DROP TABLE {table_name}")
+
+
+@timed("persist_stock_history")
+def persist_stock_history(
+    ticker_df: pd.DataFrame,
+    table_name: str = STOCKS,
+    incremental: bool = False,
+    prices_table: str = TABLE_PRICES,
+):
+    """Persist long history as narrow price facts behind the `table_name` view.
+
+    Only (Date, Ticker, OHLCV) rows are stored; Shares, DisplayName, Sector
+    and Industry stay once per ticker in the fundamentals table and the view
+    joins them in, with MCap, at query time. With `incremental` the rows are
+    upserted on (Ticker, Date) instead of replacing the table.
+    """
+    with duckwriter() as conn:
+        conn.register("ticker_history", ticker_df)
+        query = stock_prices_query("ticker_history")
+        try:
+            _migrate_stocks_table(conn, table_name, prices_table)
+            if incremental and table_exists(conn, prices_table):
+                conn.execute(f"CREATE OR REPLACE TEMP TABLE stocks_delta AS {query}")
+                _merge_stocks(conn, "stocks_delta", prices_table)
+                conn.execute("DROP TABLE stocks_delta")
+            else:
+                conn.execute(f"CREATE OR REPLACE TABLE {prices_table} AS {query}")
+            conn.execute(create_fundamentals_table_ddl())
+            conn.execute(create_stocks_view_ddl(table_name, prices_table))
+        finally:
+            conn.unregister("ticker_history")
+        log.info(f"Stocks Persisted: {prices_table}, incremental: {incremental}")
+
+
+def read_fundamentals(
+    tickers: list, ttl_days: int, table_name: str = TABLE_FUNDAMENTALS
+) -> pd.DataFrame:
+    """Fundamentals of `tickers` fetched within the last `ttl_days` days."""
+    with duckwriter() as conn:
+        conn.execute(create_fundamentals_table_ddl(table_name))
+        conn.register("universe", pd.DataFrame({TICKER: tickers}))
+        try:
+            return conn.execute(
+                fresh_fundamentals_query("universe", ttl_days, table_name)
+            ).fetch_df()
+        finally:
+            conn.unregister("universe")
+
+
+def persist_fundamentals(
+    fundamentals_df: pd.DataFrame, table_name: str = TABLE_FUNDAMENTALS
+):
+    with duckwriter() as conn:
+        conn.execute(create_fundamentals_table_ddl(table_name))
+        conn.register("fundamentals_delta", fundamentals_df)
+        try:
+            conn.execute(upsert_fundamentals_query("fundamentals_delta", table_name))
+        finally:
+            conn.unregister("fundamentals_delta")
+        log.info(f"Fundamentals Persisted: {fundamentals_df.shape}")
+
+
+def _refresh_since(
+    conn, table_name: str, query_builder, incremental: bool, since=None
+) -> bool:
+    """Recompute `table_name` only from its last persisted date onwards.
+
+    The last date is recomputed as well since it may have been built from a
+    partial intraday bar, and so is everything from `since`, the first date
+    of the stock rows upserted by the run, when earlier: tickers new to the
+    universe come with history before the last date. Returns False when
+    there is nothing to resume from and the caller has to build the table in
+    full.
+    """
+    if not (incremental and table_exists(conn, table_name)):
+        return False
+    if (last := conn.execute(max_date_query(table_name)).fetchone()[0]) is None:
+        return False
+    since = min(pd.Timestamp(since), pd.Timestamp(last)) if since else last
+    query = query_builder(since)
+    log.info(f"Incremental {table_name} refresh since {since}: {query}")
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.execute(delete_since_query(table_name, since))
+        conn.execute(f"INSERT INTO {table_name} BY NAME {query}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return True
+
+
+@timed("persist_top_mcap")
+def persist_top_mcap(
+    top_n: int,
+    stock_table_name: str = STOCKS,
+    incremental: bool = False,
+    lookback: int = 30,
+    partitioned: bool = False,
+    since=None,
+):
+    """
+    Top `top_n` stocks by MCap per date into TopMcap. Incremental runs only
+    recompute the dates from `since`, the first upserted date, or TopMcap's
+    last date, whichever is earlier.
+    """
+
+    def query_builder(since=None):
+        return topn_mcap_query(
+            top_n=top_n,
+            stock_table_name=stock_table_name,
+            since=since,
+            lookback=lookback,
+            partitioned=partitioned,
+        )
+
+    with duckwriter() as conn:
+        if _refresh_since(conn, TABLE_TOPM, query_builder, incremental, since):
+            return
+        query = f"CREATE OR REPLACE TABLE {TABLE_TOPM} AS {query_builder()}"
+        log.info(f"TopMcap Query: {query}")
+        conn.execute(query)
 
-    table_exists_query = f"SELECT COUNT(*) FROM information_schema.tables WHERE table_name = '{table_name}'"
-    table_exists = conn.execute(table_exists_query).fetchone()[0] > 0
-    if table_exists:
-        query = f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM stocks"
-    else:
-        query = f"CREATE TABLE {table_name} AS SELECT * FROM stocks"
 
-    log.info(f"Stocks Query: {query}")
-    conn.execute(query)
+def _index_resume_point(conn, incremental: bool, since=None) -> tuple:
+    """
+    Rebalance date and level of the last segment, or with `since` of the
+    segment of the last date before it (and before the last index date,
+    refreshed like TopMcap's), (None, None) to rebuild in full.
+    """
+    if not (incremental and column_exists(conn, "index", REBALANCE_DATE)):
+        return None, None
+    if since and (last := conn.execute(max_date_query("index")).fetchone()[0]):
+        since = min(pd.Timestamp(since), pd.Timestamp(last))
+    return conn.execute(index_resume_query(since)).fetchone() or (None, None)
 
 
-def persist_top_mcap(top_n: int, stock_table_name: str = STOCKS):
-    query = topn_mcap_query(top_n=top_n, stock_table_name=stock_table_name)
+@timed("persist_index_table")
+def persist_index_table(
+    table_name: str = TABLE_TOPM,
+    stock_table_name: str = STOCKS,
+    incremental: bool = False,
+    partitioned: bool = False,
+    since=None,
+):
+    """Compute the divisor based equal-weighted index from `table_name`.
+
+    Incremental runs resume from the last rebalance date, seeded with the
+    level persisted for it, so only the current segment and the new days are
+    recomputed. With `since`, the first date TopMcap was refreshed from, they
+    resume from the rebalance date of the segment before it instead.
+    """
+    with duckwriter() as conn:
+        since, base_level = _index_resume_point(conn, incremental, since)
+        members = conn.execute(index_members_query(table_name, since)).fetch_df()
+        if members.empty:
+            log.warning(f"No constituents in {table_name} since {since}.")
+            return
+        closes = conn.execute(
+            index_closes_query(table_name, stock_table_name, since, partitioned)
+        ).fetch_df()
+        index_df = divisor_index(closes, members, base_level)
+
+        log.info(f"Index Table {'Resume since ' + str(since) if since else 'Create'}")
+        conn.register("index_df", index_df)
+        try:
+            if since is None:
+                conn.execute("CREATE OR REPLACE TABLE index AS SELECT * FROM index_df")
+                return
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                conn.execute(delete_since_query("index", since))
+                conn.execute("INSERT INTO index BY NAME SELECT * FROM index_df")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.unregister("index_df")
+
+
+@timed("persist_index_analytics")
+def persist_index_analytics(
+    table_name: str = TABLE_TOPM, analytics_table: str = TABLE_ANALYTICS
+):
+    """
+    Materialize the index summary metrics once per ingestion, so the dashboard
+    reads them instead of recomputing returns on every rerun. Rebuilt in full,
+    it is one row per index date.
+    """
+    with duckwriter() as conn:
+        if not table_exists(conn, "index"):
+            log.warning("No index table, skipping the index analytics.")
+            return
+        conn.execute(create_index_analytics_ddl(table_name, analytics_table))
+        rows = conn.execute(f"SELECT COUNT(*) FROM {analytics_table}").fetchone()[0]
+    log.info(f"Index analytics computed: {rows} days.")
+
+
+@timed("persist_indices")
+def persist_indices(
+    definitions: list = None,
+    stock_table_name: str = STOCKS,
+    lookback: int = 30,
+    partitioned: bool = False,
+):
+    """
+    Materialize every registered index definition together.
+
+    The lookback window is scanned and ranked once; each definition's
+    constituents come from joining the ranks to the definitions, into
+    IndexMembers, and the divisor index of each is stored in `indices`.
+    Variants are rebuilt over the lookback window on every run.
+    """
+    definitions = definitions or index_definitions()
+    with duckwriter() as conn:
+        conn.register("index_definitions", definitions_frame(definitions))
+        try:
+            conn.execute(
+                ranked_stocks_ddl(
+                    "ranked_stocks", stock_table_name, lookback, partitioned
+                )
+            )
+            conn.execute(create_index_members_ddl("ranked_stocks", "index_definitions"))
+            members = conn.execute(
+                f"SELECT {INDEX_NAME}, weighting, {DATE}, {TICKER} FROM {TABLE_INDEX_MEMBERS}"
+            ).fetch_df()
+            closes = conn.execute(index_member_closes_query("ranked_stocks")).fetch_df()
+        finally:
+            conn.execute("DROP TABLE IF EXISTS ranked_stocks")
+            conn.unregister("index_definitions")
+        if members.empty:
+            log.warning(f"No constituents for any index in {stock_table_name}.")
+            return
+
+        closes_by_index = dict(tuple(closes.groupby(INDEX_NAME)))
+        indices_df = pd.concat(
+            [
+                divisor_index(
+                    closes_by_index[index_name],
+                    index_members,
+                    cap_weighted=index_members["weighting"].iat[0] == CAP_WEIGHT,
+                    level_column=LEVEL,
+                ).assign(**{INDEX_NAME: index_name})
+                for index_name, index_members in members.groupby(INDEX_NAME)
+            ],
+            ignore_index=True,
+        )
+        log.info(
+            f"Indices computed: {indices_df[INDEX_NAME].nunique()} indices from {len(definitions)} definitions."
+        )
+        conn.register("indices_df", indices_df)
+        try:
+            conn.execute(
+                f"CREATE OR REPLACE TABLE {TABLE_INDICES} AS SELECT * FROM indices_df"
+            )
+        finally:
+            conn.unregister("indices_df")
+    return indices_df
+
+
+def query_indices() -> pd.DataFrame:
     conn = duckconn()
-    table_exists_query = f"SELECT COUNT(*) FROM information_schema.tables WHERE table_name = '{TABLE_TOPM}'"
-    table_exists = conn.execute(table_exists_query).fetchone()[0] > 0
-    if table_exists:
-        query = f"CREATE OR REPLACE TABLE {TABLE_TOPM} AS {query}"
-    else:
-        query = f"CREATE TABLE {TABLE_TOPM} AS {query}"
-    log.info(f"TopMcap Query: {query}")
-    conn.execute(query)
-
-
-def persist_index_table(table_name: str = TABLE_TOPM) -> pd.DataFrame:
-    query = (
-        f"CREATE OR REPLACE TABLE index AS {equal_weighted_index_builder(table_name)}"
-    )
-    log.info(f"Index Table Create: {query}")
-    duckconn().execute(query)
+    if not table_exists(conn, TABLE_INDICES):
+        return pd.DataFrame(columns=[INDEX_NAME, DATE, STOCK_COUNT, LEVEL])
+    return conn.execute(indices_query()).fetch_df()
+
+
+def query_index_analytics(analytics_table: str = TABLE_ANALYTICS) -> pd.DataFrame:
+    conn = duckconn()
+    if not table_exists(conn, analytics_table):
+        return pd.DataFrame()
+    return conn.execute(index_analytics_query(analytics_table)).fetch_df()
 
 
 def query_equal_weighted_index() -> pd.DataFrame:
@@ -59,5 +375,28 @@ def query_equal_weighted_index() -> pd.DataFrame:
     return duckconn().execute(query).fetch_df()
 
 
+def query_live_index_seed(
+    table_name: str = TABLE_TOPM, stock_table_name: str = STOCKS
+) -> pd.DataFrame:
+    """Seed of the intraday index, empty until the index has been built."""
+    conn = duckconn()
+    if not table_exists(conn, "index"):
+        return pd.DataFrame()
+    return conn.execute(live_index_seed_query(table_name, stock_table_name)).fetch_df()
+
+
 def get_stock_composition() -> pd.DataFrame:
     return duckconn().execute(get_index_stock_composition()).fetch_df()
+
+
+def get_composition_changes(table_name: str = TABLE_TOPM) -> pd.DataFrame:
+    return duckconn().execute(composition_changes_query(table_name)).fetch_df()
+
+
+def stock_history_batches(table_name: str = STOCKS, batch_rows: int = 100_000):
+    """Full stock history as a pyarrow RecordBatchReader of `batch_rows` rows."""
+    return (
+        duckconn()
+        .execute(stock_history_query(table_name))
+        .fetch_record_batch(batch_rows)
+    )
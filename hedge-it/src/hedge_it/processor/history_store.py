@@ -0,0 +1,58 @@
+import os
+import shutil
+
+from hedge_it.commons import get_logger
+from hedge_it.commons.constants import (
+    HISTORY_DIR,
+    PARTITION_MONTH,
+    PARTITION_YEAR,
+    STOCKS,
+)
+from hedge_it.processor.duck_connection import duckwriter
+from hedge_it.processor.queries import (
+    export_history_query,
+    partition_months_query,
+)
+
+log = get_logger()
+
+
+def history_source(history_dir: str = HISTORY_DIR) -> str:
+    """Table expression scanning the Parquet history store.
+
+    Used in place of the stocks table name; queries built with
+    `partitioned=True` filter on year/month so only the relevant partitions
+    are read. The scan is inlined rather than wrapped in a view because
+    DuckDB does not prune hive partitions through views.
+    """
+    return f"read_parquet('{history_dir}/*/*/*.parquet', hive_partitioning = true)"
+
+
+def export_history(
+    table_name: str = STOCKS, history_dir: str = HISTORY_DIR, since=None
+):
+    """Write `table_name` to Parquet partitioned by year/month.
+
+    Only the months from `since` on are rewritten; their partition
+    directories are removed first so stale files from earlier exports never
+    linger next to the new ones. Without `since` the whole store is deleted
+    and rewritten, as on every full (non incremental) ingestion run.
+    """
+    with duckwriter() as conn:
+        months = conn.execute(partition_months_query(table_name, since)).fetchall()
+        if since is None:
+            log.warning(f"Rewriting the whole history store {history_dir}.")
+            shutil.rmtree(history_dir, ignore_errors=True)
+        for year, month in months:
+            shutil.rmtree(
+                os.path.join(
+                    history_dir,
+                    f"{PARTITION_YEAR}={year}",
+                    f"{PARTITION_MONTH}={month}",
+                ),
+                ignore_errors=True,
+            )
+        conn.execute(export_history_query(table_name, history_dir, since))
+    log.info(
+        f"History exported to {history_dir}, months: {len(months)}, since: {since}"
+    )
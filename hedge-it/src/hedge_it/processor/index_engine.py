@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from hedge_it.commons import get_logger
+from hedge_it.commons.constants import (
+    CLOSE,
+    DATE,
+    DIVISOR,
+    EQUAL_WEIGHTED_INDEX,
+    M_CAP,
+    REBALANCE_DATE,
+    STOCK_COUNT,
+    TICKER,
+)
+
+log = get_logger()
+
+
+def _weighted_mean(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Row-wise mean of `values` weighted by `weights`, skipping NaN in either."""
+    weights = np.where(np.isnan(values), np.nan, weights)
+    return np.nansum(values * weights, axis=1) / np.nansum(weights, axis=1)
+
+
+def divisor_index(
+    closes: pd.DataFrame,
+    members: pd.DataFrame,
+    base_level: float = None,
+    cap_weighted: bool = False,
+    level_column: str = EQUAL_WEIGHTED_INDEX,
+) -> pd.DataFrame:
+    """Equal-weighted index level with divisor continuity across rebalances.
+
+    `closes` and `members` are long (Date, Ticker[, Close]) frames: every
+    constituent per date and the closes of every ticker that is a constituent
+    at some point. A rebalance happens on each date the constituent set changes:
+    the old holdings are valued at that date's closes, and the new set is
+    bought in equal value at that level, so the series has no jump. Between
+    rebalances the share counts are held, i.e.
+
+        level_t = sum(close_i,t / close_i,r) / divisor,  divisor = N / level_r
+
+    over the constituents of the segment starting at rebalance date r. The
+    first date starts at `base_level`, the mean constituent close by default.
+
+    With `cap_weighted` each constituent is bought in proportion to its MCap at
+    the rebalance date instead, which needs an MCap column in `closes`. The
+    level is then not a sum over a single divisor, so Divisor is left NaN.
+    """
+    is_member = (
+        members.assign(member=True)
+        .pivot(index=DATE, columns=TICKER, values="member")
+        .notna()
+        .sort_index()
+    )
+    prices = (
+        closes.pivot(index=DATE, columns=TICKER, values=CLOSE)
+        .reindex(index=is_member.index, columns=is_member.columns)
+        .to_numpy(dtype=np.float64)
+    )
+    member = is_member.to_numpy()
+    weights = (
+        closes.pivot(index=DATE, columns=TICKER, values=M_CAP)
+        .reindex(index=is_member.index, columns=is_member.columns)
+        .to_numpy(dtype=np.float64)
+        if cap_weighted
+        else np.ones_like(prices)
+    )
+
+    changed = np.r_[True, (member[1:] != member[:-1]).any(axis=1)]
+    segment_starts = np.flatnonzero(changed)
+    segment = np.cumsum(changed) - 1
+    start_row = segment_starts[segment]
+
+    # Growth of each segment's holdings since the segment start.
+    with np.errstate(invalid="ignore", divide="ignore"):
+        growth = _weighted_mean(
+            prices / prices[start_row], np.where(member, weights[start_row], np.nan)
+        )
+        # Growth of the outgoing holdings up to each rebalance date.
+        previous, current = segment_starts[:-1], segment_starts[1:]
+        link = _weighted_mean(
+            prices[current] / prices[previous],
+            np.where(member[previous], weights[previous], np.nan),
+        )
+    if base_level is None:
+        base_level = np.nanmean(np.where(member[0], prices[0], np.nan))
+    segment_level = base_level * np.r_[1.0, np.cumprod(link)]
+
+    stock_count = member.sum(axis=1)
+    index_df = pd.DataFrame(
+        {
+            DATE: is_member.index,
+            STOCK_COUNT: stock_count,
+            level_column: segment_level[segment] * growth,
+            DIVISOR: np.nan if cap_weighted else stock_count / segment_level[segment],
+            REBALANCE_DATE: is_member.index[start_row],
+        }
+    )
+    log.info(
+        f"Divisor index computed: {len(index_df)} days, {len(segment_starts)} segments."
+    )
+    return index_df
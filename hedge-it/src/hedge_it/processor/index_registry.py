@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+
+import pandas as pd
+
+from hedge_it.commons.constants import CAP_WEIGHT, EQUAL_WEIGHT
+
+
+@dataclass(frozen=True)
+class IndexDefinition:
+    """
+    A published index: the `top_n` stocks by MCap, over the whole universe or,
+    with `by_sector`, within each Sector, giving one index per sector named
+    `<name>:<sector>`. `weighting` is equal or cap.
+    """
+
+    name: str
+    top_n: int
+    weighting: str = EQUAL_WEIGHT
+    by_sector: bool = False
+
+
+_definitions = {}
+
+
+def register_index(definition: IndexDefinition) -> IndexDefinition:
+    if definition.weighting not in (EQUAL_WEIGHT, CAP_WEIGHT):
+        raise ValueError(f"Unknown weighting {definition.weighting!r}")
+    _definitions[definition.name] = definition
+    return definition
+
+
+def index_definitions() -> list:
+    return list(_definitions.values())
+
+
+def definitions_frame(definitions: list) -> pd.DataFrame:
+    """Definitions as a frame to register with DuckDB and join against."""
+    return pd.DataFrame(
+        {
+            "name": [d.name for d in definitions],
+            "top_n": [d.top_n for d in definitions],
+            "weighting": [d.weighting for d in definitions],
+            "by_sector": [d.by_sector for d in definitions],
+        }
+    )
+
+
+for _definition in (
+    IndexDefinition("top50", 50),
+    IndexDefinition("top100", 100),
+    IndexDefinition("top500", 500),
+    IndexDefinition("top100_cap", 100, CAP_WEIGHT),
+    IndexDefinition("sector_top10", 10, by_sector=True),
+):
+    register_index(_definition)
@@ -0,0 +1,161 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from hedge_it.commons import get_logger
+from hedge_it.commons.constants import (
+    CLOSE,
+    DATE,
+    DIVISOR,
+    EQUAL_WEIGHTED_INDEX,
+    REFERENCE_CLOSE,
+    TICKER,
+)
+from hedge_it.processor.duck_db import query_live_index_seed
+
+log = get_logger()
+
+
+class LiveIndex:
+    """
+    Equal-weighted index level moved by every trade of a constituent.
+
+    Within a segment the level is `sum(price_i / reference_i) / divisor` (see
+    `divisor_index`), a weighted sum of the last prices. Each constituent owns
+    a slot in fixed-size arrays of last prices and weights, so a tick only
+    swaps its slot's price into the running sum: O(1) whatever the index size.
+    The sum is recomputed in full every `resync_ticks` to shed rounding drift.
+
+    Ticks are applied by one feed thread; readers get the level and a ring
+    buffer of levels sampled by that thread.
+    """
+
+    def __init__(
+        self,
+        tickers: list,
+        reference_closes: np.ndarray,
+        closes: np.ndarray,
+        divisor: float,
+        history_size: int = 4 * 3600,
+        resync_ticks: int = 100_000,
+    ):
+        self.tickers = list(tickers)
+        self.slots = {ticker: slot for slot, ticker in enumerate(self.tickers)}
+        self.prices = np.array(closes, dtype=np.float64)
+        self.weights = 1.0 / (np.asarray(reference_closes, dtype=np.float64) * divisor)
+        self.close_level = self.level = float(self.prices @ self.weights)
+        self.ticks = 0
+        self.resync_ticks = resync_ticks
+        self._resync_at = resync_ticks
+        self._lock = threading.Lock()
+        self._times = np.zeros(history_size, dtype="datetime64[ms]")
+        self._levels = np.zeros(history_size, dtype=np.float64)
+        self._samples = 0
+
+    @classmethod
+    def from_seed(cls, seed: pd.DataFrame, **kwargs) -> "LiveIndex":
+        """From the (Ticker, ReferenceClose, Close, Divisor) rows of `query_live_index_seed`."""
+        return cls(
+            seed[TICKER].tolist(),
+            seed[REFERENCE_CLOSE].to_numpy(),
+            seed[CLOSE].to_numpy(),
+            seed[DIVISOR].iat[0],
+            **kwargs,
+        )
+
+    def apply(self, ticks: list) -> float:
+        """
+        Apply a batch of (ticker, price) trades in order and return the level.
+        Trades of tickers outside the index are ignored.
+        """
+        slots, weights, prices = self.slots, self.weights, self.prices
+        level, applied = self.level, 0
+        for ticker, price in ticks:
+            slot = slots.get(ticker)
+            if slot is not None:
+                level += weights[slot] * (price - prices[slot])
+                prices[slot] = price
+                applied += 1
+        self.ticks += applied
+        if self.ticks >= self._resync_at:
+            level = float(prices @ weights)
+            self._resync_at = self.ticks + self.resync_ticks
+        self.level = float(level)
+        return self.level
+
+    def sample(self, at: float = None):
+        """Keep the current level in the history, at `at` seconds since the epoch."""
+        with self._lock:
+            position = self._samples % len(self._levels)
+            self._times[position] = int((time.time() if at is None else at) * 1000)
+            self._levels[position] = self.level
+            self._samples += 1
+
+    def history(self) -> pd.DataFrame:
+        """Sampled (Date, EqualWeightedIndex) levels, oldest first."""
+        with self._lock:
+            size = len(self._levels)
+            order = np.arange(self._samples - min(self._samples, size), self._samples)
+            times, levels = self._times[order % size], self._levels[order % size]
+        return pd.DataFrame({DATE: times, EQUAL_WEIGHTED_INDEX: levels})
+
+
+def load_live_index(**kwargs) -> LiveIndex:
+    """The intraday index continuing the last persisted level, None before the first build."""
+    seed = query_live_index_seed()
+    if seed.empty:
+        log.warning("No index built yet, the intraday index needs one.")
+        return None
+    live = LiveIndex.from_seed(seed, **kwargs)
+    log.info(
+        f"Intraday index over {len(live.tickers)} constituents from level {live.level:.4f}"
+    )
+    return live
+
+
+def _follow(live: LiveIndex, feed, sample_seconds: float):
+    next_sample = 0.0
+    try:
+        for ticks in feed:
+            live.apply(ticks)
+            now = time.time()
+            if now >= next_sample:
+                live.sample(now)
+                next_sample = now + sample_seconds
+    except Exception:
+        log.exception("Quote feed failed, the intraday index stopped moving.")
+    log.info(f"Quote feed ended after {live.ticks} ticks.")
+
+
+_running = None
+
+
+def run_live_index(live: LiveIndex, feed, sample_seconds: float = 1.0) -> LiveIndex:
+    """
+    Apply the tick batches of `feed` to `live` on a daemon thread, sampling the
+    level every `sample_seconds`. Replaces (and closes the feed of) the live
+    index run before.
+    """
+    global _running
+    stop_live_index()
+    threading.Thread(
+        target=_follow,
+        args=(live, feed, sample_seconds),
+        name="live-index",
+        daemon=True,
+    ).start()
+    _running = (live, feed)
+    return live
+
+
+def stop_live_index():
+    global _running
+    if _running is not None:
+        _running[1].close()
+        _running = None
+
+
+def live_index() -> LiveIndex:
+    return _running[0] if _running is not None else None
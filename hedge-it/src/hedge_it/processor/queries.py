@@ -1,19 +1,64 @@
 from hedge_it.commons.constants import (
     CLOSE,
+    CUMULATIVE_RETURN,
+    DAILY_RETURN,
     DATE,
+    DIVISOR,
     DISPLAY_NAME,
+    DRAWDOWN,
+    ENTERED,
     EQUAL_WEIGHTED_INDEX,
+    EXITED,
+    FETCHED_AT,
+    HIGH,
+    INDEX_NAME,
+    INDUSTRY,
+    LEVEL,
+    LOW,
     M_CAP,
+    MONTHLY_RETURN,
+    OPEN,
+    PARTITION_MONTH,
+    PARTITION_YEAR,
+    REBALANCE_DATE,
+    REFERENCE_CLOSE,
+    ROLLING_VOLATILITY,
     SECTOR,
+    SHARES,
     STOCK_COUNT,
     STOCKS,
+    TABLE_ANALYTICS,
+    TABLE_FUNDAMENTALS,
+    TABLE_INDEX_MEMBERS,
+    TABLE_INDICES,
+    TABLE_PRICES,
     TABLE_TOPM,
     TICKER,
+    TURNOVER,
     VALUE,
+    VOLUME,
+    WEEKLY_RETURN,
 )
 
 
-def topn_mcap_query(top_n: int, stock_table_name: str = STOCKS) -> str:
+def partition_filter(since) -> str:
+    """Predicate on the history store's year/month partitions, used for pruning."""
+    return f"make_date({PARTITION_YEAR}, {PARTITION_MONTH}, 1) >= date_trunc('month', {since})"
+
+
+def topn_mcap_query(
+    top_n: int,
+    stock_table_name: str = STOCKS,
+    since=None,
+    lookback: int = 30,
+    partitioned: bool = False,
+) -> str:
+    since = (
+        f"'{since}'::TIMESTAMP" if since else f"CURRENT_DATE - INTERVAL {lookback} DAY"
+    )
+    date_filter = f"{DATE} >= {since}"
+    if partitioned:
+        date_filter = f"{partition_filter(since)}\n  AND {date_filter}"
     return f"""
 SELECT
   {DATE},
@@ -25,7 +70,7 @@ SELECT
 FROM
   {stock_table_name}
 WHERE
-  {DATE} >= CURRENT_DATE - INTERVAL 30 DAY
+  {date_filter}
 QUALIFY
   ROW_NUMBER() OVER (PARTITION BY {DATE} ORDER BY {M_CAP} DESC) <= {top_n}
 ORDER BY
@@ -34,41 +79,548 @@ ORDER BY
 """
 
 
+def stock_prices_query(history_view: str) -> str:
+    """Narrow daily facts of `history_view`, ticker attributes live in fundamentals."""
+    return f"""
+SELECT
+  {DATE},
+  {TICKER}::VARCHAR AS {TICKER},
+  {OPEN},
+  {CLOSE},
+  {LOW},
+  {HIGH},
+  {VOLUME}
+FROM
+  {history_view}
+"""
+
+
+def create_stocks_view_ddl(
+    stock_table_name: str = STOCKS,
+    prices_table: str = TABLE_PRICES,
+    fundamentals_table: str = TABLE_FUNDAMENTALS,
+) -> str:
+    """Stocks as the price facts joined to the fundamentals dimension, MCap computed on read."""
+    return f"""
+CREATE OR REPLACE VIEW {stock_table_name} AS
+SELECT
+  f.{SHARES},
+  f.{INDUSTRY},
+  f.{SECTOR},
+  f.{DISPLAY_NAME},
+  p.{TICKER},
+  p.{DATE},
+  p.{OPEN},
+  p.{CLOSE},
+  p.{LOW},
+  p.{HIGH},
+  p.{VOLUME},
+  f.{SHARES} * p.{CLOSE} AS {M_CAP}
+FROM
+  {prices_table} p
+JOIN
+  {fundamentals_table} f
+ON
+  p.{TICKER} = f.{TICKER};
+"""
+
+
+def latest_dates_query(stock_table_name: str = STOCKS) -> str:
+    return f"""
+SELECT
+  {TICKER},
+  MAX({DATE})::DATE AS {DATE}
+FROM
+  {stock_table_name}
+GROUP BY
+  {TICKER};
+"""
+
+
+def upsert_delete_query(delta_view: str, stock_table_name: str = STOCKS) -> str:
+    return f"""
+DELETE FROM {stock_table_name}
+USING {delta_view}
+WHERE
+  {stock_table_name}.{TICKER} = {delta_view}.{TICKER}
+  AND {stock_table_name}.{DATE} = {delta_view}.{DATE}
+  AND {delta_view}.{CLOSE} IS NOT NULL;
+"""
+
+
+def upsert_insert_query(delta_view: str, stock_table_name: str = STOCKS) -> str:
+    return f"""
+INSERT INTO {stock_table_name} BY NAME
+SELECT * FROM {delta_view}
+WHERE {CLOSE} IS NOT NULL;
+"""
+
+
+def max_date_query(table_name: str) -> str:
+    return f"""SELECT MAX({DATE}) FROM {table_name};"""
+
+
+def delete_since_query(table_name: str, since) -> str:
+    return f"""DELETE FROM {table_name} WHERE {DATE} >= '{since}';"""
+
+
 def create_topm_table_ddl(mcap_table_name: str = TABLE_TOPM) -> str:
     return f"""CREATE TABLE IF NOT EXISTS {mcap_table_name}"""
 
 
-def equal_weighted_index_builder(table_name: str) -> str:
+def index_members_query(table_name: str = TABLE_TOPM, since=None) -> str:
+    date_filter = f"WHERE {DATE} >= '{since}'::TIMESTAMP" if since else ""
+    return f"""
+SELECT
+  {DATE},
+  {TICKER}
+FROM
+  {table_name}
+{date_filter};
+"""
+
+
+def index_closes_query(
+    table_name: str = TABLE_TOPM,
+    stock_table_name: str = STOCKS,
+    since=None,
+    partitioned: bool = False,
+) -> str:
+    since = (
+        f"'{since}'::TIMESTAMP"
+        if since
+        else f"(SELECT MIN({DATE}) FROM {table_name})::TIMESTAMP"
+    )
+    date_filter = f"{DATE} >= {since}"
+    if partitioned:
+        date_filter = f"{partition_filter(since)}\n  AND {date_filter}"
+    return f"""
+SELECT
+  {DATE},
+  {TICKER},
+  {CLOSE}
+FROM
+  {stock_table_name}
+WHERE
+  {date_filter}
+  AND {TICKER} IN (SELECT DISTINCT {TICKER} FROM {table_name});
+"""
+
+
+def index_resume_query(before=None) -> str:
+    """Rebalance date and level of the segment of the last index date, before `before` if given."""
+    date_filter = f"WHERE {DATE} < '{before}'::TIMESTAMP" if before else ""
+    return f"""
+SELECT
+  last.{REBALANCE_DATE},
+  rebalance.{EQUAL_WEIGHTED_INDEX}
+FROM
+  index last
+JOIN
+  index rebalance
+ON
+  rebalance.{DATE} = last.{REBALANCE_DATE}
+WHERE
+  last.{DATE} = (SELECT MAX({DATE}) FROM index {date_filter});
+"""
+
+
+def live_index_seed_query(
+    table_name: str = TABLE_TOPM, stock_table_name: str = STOCKS
+) -> str:
+    """
+    Constituents on the last index date with their close at the segment's
+    rebalance date, their last close and the segment divisor.
+    """
+    return f"""
+SELECT
+  members.{TICKER},
+  reference.{CLOSE} AS {REFERENCE_CLOSE},
+  latest.{CLOSE},
+  last.{DIVISOR}
+FROM
+  index last
+JOIN
+  {table_name} members
+ON
+  members.{DATE} = last.{DATE}
+JOIN
+  {stock_table_name} reference
+ON
+  reference.{TICKER} = members.{TICKER}
+  AND reference.{DATE} = last.{REBALANCE_DATE}
+JOIN
+  {stock_table_name} latest
+ON
+  latest.{TICKER} = members.{TICKER}
+  AND latest.{DATE} = last.{DATE}
+WHERE
+  last.{DATE} = (SELECT MAX({DATE}) FROM index)
+ORDER BY
+  members.{TICKER};
+"""
+
+
+def equal_weighted_index_query() -> str:
+    return """SELECT * FROM index;"""
+
+
+def get_index_stock_composition(table_name: str = TABLE_TOPM) -> str:
+    """Constituents per date with their value in the index level.
+
+    A constituent is worth `close / (close at rebalance * divisor)`, its share
+    of `sum(close_i / reference_i) / divisor`, so the values of a date add up
+    to that date's level.
+    """
+    return f"""
+SELECT
+  members.{DATE},
+  members.{TICKER},
+  members.{DISPLAY_NAME},
+  members.{SECTOR},
+  members.{M_CAP},
+  members.{CLOSE},
+  index.{STOCK_COUNT},
+  index.{REBALANCE_DATE},
+  members.{CLOSE} / (reference.{CLOSE} * index.{DIVISOR}) AS {VALUE}
+FROM
+  {table_name} members
+LEFT JOIN
+  index
+ON
+  index.{DATE} = members.{DATE}
+LEFT JOIN
+  {table_name} reference
+ON
+  reference.{TICKER} = members.{TICKER}
+  AND reference.{DATE} = index.{REBALANCE_DATE}
+ORDER BY
+  members.{DATE},
+  members.{M_CAP} DESC;
+"""
+
+
+def create_index_analytics_ddl(
+    table_name: str = TABLE_TOPM,
+    analytics_table: str = TABLE_ANALYTICS,
+    week_days: int = 5,
+    month_days: int = 21,
+    volatility_days: int = 21,
+) -> str:
+    """Summary metrics of the index per date, in percent.
+
+    Weekly and monthly returns are over the trailing `week_days` and
+    `month_days` trading days, drawdown is from the running peak and the
+    volatility is annualized over the trailing `volatility_days` daily returns.
+    Turnover is the share of the constituents that entered on that date,
+    NULL on the first date.
+    """
+    return f"""
+CREATE OR REPLACE TABLE {analytics_table} AS
+WITH days AS (
+  SELECT
+    {DATE},
+    LAG({DATE}) OVER (ORDER BY {DATE}) AS previous_date
+  FROM
+    (SELECT DISTINCT {DATE} FROM {table_name})
+),
+entered AS (
+  SELECT
+    members.{DATE},
+    COUNT(*) AS entered
+  FROM
+    (
+      SELECT {DATE}, LAG({DATE}) OVER (PARTITION BY {TICKER} ORDER BY {DATE}) AS member_before
+      FROM {table_name}
+    ) members
+  JOIN
+    days
+  ON
+    days.{DATE} = members.{DATE}
+  WHERE
+    members.member_before IS DISTINCT FROM days.previous_date
+  GROUP BY
+    1
+),
+returns AS (
+  SELECT
+    {DATE},
+    {STOCK_COUNT},
+    {EQUAL_WEIGHTED_INDEX},
+    {EQUAL_WEIGHTED_INDEX} / LAG({EQUAL_WEIGHTED_INDEX}) OVER by_date - 1 AS daily_return,
+    {EQUAL_WEIGHTED_INDEX} / LAG({EQUAL_WEIGHTED_INDEX}, {week_days}) OVER by_date - 1 AS weekly_return,
+    {EQUAL_WEIGHTED_INDEX} / LAG({EQUAL_WEIGHTED_INDEX}, {month_days}) OVER by_date - 1 AS monthly_return,
+    {EQUAL_WEIGHTED_INDEX} / FIRST_VALUE({EQUAL_WEIGHTED_INDEX}) OVER by_date - 1 AS cumulative_return,
+    {EQUAL_WEIGHTED_INDEX} / MAX({EQUAL_WEIGHTED_INDEX}) OVER by_date - 1 AS drawdown
+  FROM
+    index
+  WINDOW
+    by_date AS (ORDER BY {DATE})
+)
+SELECT
+  returns.{DATE},
+  returns.{STOCK_COUNT},
+  returns.{EQUAL_WEIGHTED_INDEX},
+  returns.daily_return * 100 AS {DAILY_RETURN},
+  returns.weekly_return * 100 AS {WEEKLY_RETURN},
+  returns.monthly_return * 100 AS {MONTHLY_RETURN},
+  returns.cumulative_return * 100 AS {CUMULATIVE_RETURN},
+  returns.drawdown * 100 AS {DRAWDOWN},
+  STDDEV_SAMP(returns.daily_return) OVER (
+    ORDER BY returns.{DATE} ROWS BETWEEN {volatility_days - 1} PRECEDING AND CURRENT ROW
+  ) * SQRT(252) * 100 AS {ROLLING_VOLATILITY},
+  CASE
+    WHEN days.previous_date IS NOT NULL
+    THEN COALESCE(entered.entered, 0) / returns.{STOCK_COUNT} * 100
+  END AS {TURNOVER}
+FROM
+  returns
+LEFT JOIN
+  days
+ON
+  days.{DATE} = returns.{DATE}
+LEFT JOIN
+  entered
+ON
+  entered.{DATE} = returns.{DATE}
+ORDER BY
+  returns.{DATE};
+"""
+
+
+def index_analytics_query(analytics_table: str = TABLE_ANALYTICS) -> str:
+    return f"""SELECT * FROM {analytics_table} ORDER BY {DATE};"""
+
+
+def composition_changes_query(table_name: str = TABLE_TOPM) -> str:
+    """Tickers entering and leaving the index, per date the composition changes.
+
+    Each date's constituents are full outer joined to the previous date's, so
+    only the set differences survive; the first date lists the initial
+    constituents as entered.
+    """
     return f"""
-WITH
-  StockWeights AS (
+WITH days AS (
   SELECT
     {DATE},
-    {CLOSE},
-    COUNT(*) OVER (PARTITION BY {DATE}) AS {STOCK_COUNT}
+    LAG({DATE}) OVER (ORDER BY {DATE}) AS previous_date
   FROM
-    {table_name} )
+    (SELECT DISTINCT {DATE} FROM {table_name})
+),
+today AS (
+  SELECT days.{DATE}, members.{TICKER}
+  FROM days JOIN {table_name} members ON members.{DATE} = days.{DATE}
+),
+yesterday AS (
+  SELECT days.{DATE}, members.{TICKER}
+  FROM days JOIN {table_name} members ON members.{DATE} = days.previous_date
+)
+SELECT
+  COALESCE(today.{DATE}, yesterday.{DATE}) AS {DATE},
+  COALESCE(
+    list(today.{TICKER} ORDER BY today.{TICKER}) FILTER (WHERE yesterday.{TICKER} IS NULL), []
+  ) AS {ENTERED},
+  COALESCE(
+    list(yesterday.{TICKER} ORDER BY yesterday.{TICKER}) FILTER (WHERE today.{TICKER} IS NULL), []
+  ) AS {EXITED}
+FROM
+  today
+FULL JOIN
+  yesterday
+ON
+  today.{DATE} = yesterday.{DATE}
+  AND today.{TICKER} = yesterday.{TICKER}
+WHERE
+  today.{TICKER} IS NULL
+  OR yesterday.{TICKER} IS NULL
+GROUP BY
+  1
+ORDER BY
+  1;
+"""
+
+
+def ranked_stocks_ddl(
+    ranked_table: str,
+    stock_table_name: str = STOCKS,
+    lookback: int = 30,
+    partitioned: bool = False,
+) -> str:
+    """The lookback window in a single scan, ranked by MCap per Date and per Date and Sector."""
+    since = f"CURRENT_DATE - INTERVAL {lookback} DAY"
+    date_filter = f"{DATE} >= {since}"
+    if partitioned:
+        date_filter = f"{partition_filter(since)}\n  AND {date_filter}"
+    return f"""
+CREATE OR REPLACE TEMP TABLE {ranked_table} AS
 SELECT
+  {DATE},
+  {TICKER},
+  {DISPLAY_NAME},
+  {SECTOR},
+  {M_CAP},
+  {CLOSE},
+  ROW_NUMBER() OVER (PARTITION BY {DATE} ORDER BY {M_CAP} DESC) AS market_rank,
+  ROW_NUMBER() OVER (PARTITION BY {DATE}, {SECTOR} ORDER BY {M_CAP} DESC) AS sector_rank
+FROM
+  {stock_table_name}
+WHERE
+  {date_filter};
+"""
+
+
+def create_index_members_ddl(
+    ranked_table: str,
+    definitions_view: str,
+    table_name: str = TABLE_INDEX_MEMBERS,
+) -> str:
+    """Constituents of every defined index, joining the ranked window to the definitions."""
+    return f"""
+CREATE OR REPLACE TABLE {table_name} AS
+SELECT
+  CASE WHEN d.by_sector THEN d.name || ':' || r.{SECTOR} ELSE d.name END AS {INDEX_NAME},
+  d.weighting,
+  r.{DATE},
+  r.{TICKER},
+  r.{DISPLAY_NAME},
+  r.{SECTOR},
+  r.{M_CAP},
+  r.{CLOSE}
+FROM
+  {ranked_table} r
+JOIN
+  {definitions_view} d
+ON
+  CASE WHEN d.by_sector THEN r.sector_rank ELSE r.market_rank END <= d.top_n
+  AND (NOT d.by_sector OR r.{SECTOR} IS NOT NULL)
+ORDER BY
+  1,
+  r.{DATE},
+  r.{M_CAP} DESC;
+"""
+
+
+def index_member_closes_query(
+    ranked_table: str, table_name: str = TABLE_INDEX_MEMBERS
+) -> str:
+    """Closes and MCap of every ticker on every date, for each index it is ever part of."""
+    return f"""
+SELECT
+  m.{INDEX_NAME},
+  r.{DATE},
+  r.{TICKER},
+  r.{CLOSE},
+  r.{M_CAP}
+FROM
+  {ranked_table} r
+JOIN
+  (SELECT DISTINCT {INDEX_NAME}, {TICKER} FROM {table_name}) m
+ON
+  m.{TICKER} = r.{TICKER};
+"""
+
+
+def indices_query(table_name: str = TABLE_INDICES) -> str:
+    return f"""
+SELECT
+  {INDEX_NAME},
   {DATE},
   {STOCK_COUNT},
-  SUM({CLOSE} / {STOCK_COUNT}) AS {EQUAL_WEIGHTED_INDEX}
+  {LEVEL}
 FROM
-  StockWeights
-GROUP BY
-  {DATE}, {STOCK_COUNT}
+  {table_name}
 ORDER BY
+  {INDEX_NAME},
   {DATE};
 """
 
 
-def equal_weighted_index_query() -> str:
-    return """SELECT * FROM index;"""
+def create_fundamentals_table_ddl(table_name: str = TABLE_FUNDAMENTALS) -> str:
+    return f"""
+CREATE TABLE IF NOT EXISTS {table_name} (
+  {TICKER} VARCHAR PRIMARY KEY,
+  {SHARES} DOUBLE,
+  {INDUSTRY} VARCHAR,
+  {SECTOR} VARCHAR,
+  {DISPLAY_NAME} VARCHAR,
+  {FETCHED_AT} TIMESTAMP
+);
+"""
+
+
+def fresh_fundamentals_query(
+    universe_view: str, ttl_days: int, table_name: str = TABLE_FUNDAMENTALS
+) -> str:
+    return f"""
+SELECT
+  {SHARES},
+  {INDUSTRY},
+  {SECTOR},
+  {DISPLAY_NAME},
+  {TICKER}
+FROM
+  {table_name}
+WHERE
+  {TICKER} IN (SELECT {TICKER} FROM {universe_view})
+  AND {FETCHED_AT} >= CURRENT_TIMESTAMP::TIMESTAMP - INTERVAL {ttl_days} DAY;
+"""
+
+
+def upsert_fundamentals_query(
+    fundamentals_view: str, table_name: str = TABLE_FUNDAMENTALS
+) -> str:
+    return f"""
+INSERT OR REPLACE INTO {table_name} BY NAME
+SELECT
+  {TICKER},
+  {SHARES},
+  {INDUSTRY},
+  {SECTOR},
+  {DISPLAY_NAME},
+  CURRENT_TIMESTAMP::TIMESTAMP AS {FETCHED_AT}
+FROM
+  {fundamentals_view};
+"""
+
+
+def partition_months_query(stock_table_name: str, since=None) -> str:
+    date_filter = (
+        f"WHERE {DATE} >= date_trunc('month', '{since}'::DATE)" if since else ""
+    )
+    return f"""
+SELECT DISTINCT
+  year({DATE}) AS {PARTITION_YEAR},
+  month({DATE}) AS {PARTITION_MONTH}
+FROM
+  {stock_table_name}
+{date_filter};
+"""
 
 
-def get_index_stock_composition() -> str:
+def export_history_query(stock_table_name: str, history_dir: str, since=None) -> str:
+    date_filter = (
+        f"WHERE {DATE} >= date_trunc('month', '{since}'::DATE)" if since else ""
+    )
     return f"""
-SELECT *, {CLOSE} / {STOCK_COUNT} AS {VALUE}, {DISPLAY_NAME}
-FROM {TABLE_TOPM}
-LEFT JOIN index
-ON {TABLE_TOPM}.DATE = index.DATE
+COPY (
+  SELECT
+    *,
+    year({DATE}) AS {PARTITION_YEAR},
+    month({DATE}) AS {PARTITION_MONTH}
+  FROM
+    {stock_table_name}
+  {date_filter}
+) TO '{history_dir}' (FORMAT PARQUET, PARTITION_BY ({PARTITION_YEAR}, {PARTITION_MONTH}), OVERWRITE_OR_IGNORE);
+"""
+
+
+def stock_history_query(stock_table_name: str = STOCKS) -> str:
+    return f"""
+SELECT
+  *
+FROM
+  {stock_table_name}
+ORDER BY
+  {DATE},
+  {TICKER};
 """
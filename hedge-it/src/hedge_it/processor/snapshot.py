@@ -0,0 +1,61 @@
+import os
+import shutil
+from datetime import datetime
+
+from hedge_it.commons import get_logger
+from hedge_it.commons.constants import SNAPSHOT_DIR, STOCKS
+from hedge_it.processor.duck_connection import duckwriter
+
+log = get_logger()
+
+LATEST_POINTER = "LATEST"
+
+
+def publish_snapshot(snapshot_dir: str = SNAPSHOT_DIR, keep: int = 3) -> str:
+    """
+    Copy the committed database to `snapshot_dir` and point LATEST at it.
+
+    The copy is taken under the writer lock right after a CHECKPOINT, so it
+    holds every committed write, and both the copy and the pointer are moved
+    into place atomically. Readers therefore only ever see complete snapshots.
+    Versions go down to the microsecond, and an existing snapshot is never
+    overwritten.
+    :return: version of the published snapshot
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    with duckwriter() as conn:
+        version = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        snapshot_file = os.path.join(snapshot_dir, f"{STOCKS}-{version}.duckdb")
+        if os.path.exists(snapshot_file):
+            raise FileExistsError(f"Snapshot {snapshot_file} is already published.")
+        conn.execute("CHECKPOINT")
+        db_file = conn.execute(
+            "SELECT path FROM duckdb_databases() WHERE database_name = current_database()"
+        ).fetchone()[0]
+        shutil.copyfile(db_file, f"{snapshot_file}.tmp")
+        os.replace(f"{snapshot_file}.tmp", snapshot_file)
+
+    pointer_file = os.path.join(snapshot_dir, LATEST_POINTER)
+    with open(f"{pointer_file}.tmp", "w") as f:
+        f.write(version)
+    os.replace(f"{pointer_file}.tmp", pointer_file)
+    log.info(f"Published snapshot {snapshot_file}")
+
+    snapshots = sorted(
+        name
+        for name in os.listdir(snapshot_dir)
+        if name.startswith(f"{STOCKS}-") and name.endswith(".duckdb")
+    )
+    for name in snapshots[:-keep]:
+        os.remove(os.path.join(snapshot_dir, name))
+    return version
+
+
+def latest_snapshot(snapshot_dir: str = SNAPSHOT_DIR) -> tuple:
+    """(version, database name) of the latest published snapshot, (None, None) if none."""
+    pointer_file = os.path.join(snapshot_dir, LATEST_POINTER)
+    if not os.path.exists(pointer_file):
+        return None, None
+    with open(pointer_file) as f:
+        version = f.read().strip()
+    return version, os.path.join(snapshot_dir, f"{STOCKS}-{version}")
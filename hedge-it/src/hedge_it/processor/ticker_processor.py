@@ -1,16 +1,13 @@
-from functools import reduce
-
+import numpy as np
 import pandas as pd
 
-from hedge_it.commons import get_logger
+from hedge_it.commons import get_logger, timed
 from hedge_it.commons.constants import (
     CLOSE,
     DATE,
     HIGH,
     LOW,
-    M_CAP,
     OPEN,
-    SHARES,
     TICKER,
     VOLUME,
 )
@@ -18,45 +15,34 @@ from hedge_it.commons.constants import (
 log = get_logger()
 
 
+@timed("process_ticker_data")
 def process_ticker_data(ticker_stocks: pd.DataFrame) -> pd.DataFrame:
-    cols = [OPEN, CLOSE, LOW, HIGH, VOLUME]
-    melted_dfs = []
-    for col in cols:
-        melted_df = (
-            ticker_stocks[col]
-            .reset_index()
-            .melt(id_vars=[DATE], var_name=TICKER, value_name=col)
-            .reset_index(drop=True)
-        )
-        melted_dfs.append(melted_df)
-    ticker_df = reduce(
-        lambda left, right: pd.merge(left, right, on=[DATE, TICKER]), melted_dfs
+    """Reshape the wide yfinance frame into one row per (Date, Ticker).
+
+    The (Price, Ticker) columns already encode field x ticker, so each field
+    block is aligned on the same ticker order and stacked by flattening it
+    row-major, giving all fields in a single pass without melts or joins.
+    Rows without a Close are dropped.
+    """
+    tickers = ticker_stocks.columns.get_level_values(1).unique()
+    fields = {
+        col: ticker_stocks[col].reindex(columns=tickers).to_numpy().ravel()
+        for col in [OPEN, CLOSE, LOW, HIGH, VOLUME]
+    }
+    has_close = ~np.isnan(fields[CLOSE])
+    ticker_df = pd.DataFrame(
+        {
+            DATE: np.repeat(ticker_stocks.index.to_numpy(), len(tickers))[has_close],
+            TICKER: pd.Categorical.from_codes(
+                np.tile(np.arange(len(tickers)), len(ticker_stocks))[has_close],
+                categories=tickers,
+            ),
+            **{
+                col: fields[col][has_close].astype(np.float32)
+                for col in [OPEN, CLOSE, LOW, HIGH]
+            },
+            VOLUME: np.nan_to_num(fields[VOLUME][has_close]).astype(np.int64),
+        }
     )
     log.info(f"Ticker Data Processed: {ticker_df.shape}")
     return ticker_df
-
-
-def compute_market_cap(
-    ticker_history: pd.DataFrame, ticker_shares_history: pd.DataFrame
-) -> pd.DataFrame:
-    log.info(
-        f"Computing Market Cap.TickerShares({ticker_history.shape}) and TickerHistory({ticker_shares_history.shape}).",
-    )
-    stocks_df = pd.merge(
-        ticker_shares_history, ticker_history, on=[TICKER], how="inner"
-    )
-    stocks_df[M_CAP] = stocks_df[SHARES] * stocks_df[CLOSE]
-    log.info("Market Cap Computed.")
-    return stocks_df
-
-
-def ticker_processor(
-    ticker_stocks: pd.DataFrame, ticker_shares: pd.DataFrame
-) -> pd.DataFrame:
-    log.info(
-        "Processing Ticker Data and Computing Market Cap.",
-    )
-    ticker_df = process_ticker_data(ticker_stocks)
-    stocks_df = compute_market_cap(ticker_df, ticker_shares)
-    log.info(f"ticker_processor Completed. Stocks DataFrame: {stocks_df.shape}")
-    return stocks_df
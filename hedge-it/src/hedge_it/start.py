@@ -3,7 +3,7 @@ import os
 
 
 from hedge_it.commons import CliArguments, CustomLogger, get_logger
-from hedge_it.dashboards.index_board import build_data, plot
+from hedge_it.dashboards.index_board import open_latest_snapshot, plot
 
 log = get_logger()
 
@@ -20,16 +20,19 @@ def parse_args():
 
 def start(cli_args: CliArguments):
     """
-    Start the Hedge-It Application
+    Start the Hedge-It dashboard on the latest published snapshot
     :param cli_args: CliArgs
     :return:
     """
-    build_data(
-        cli_args.polygon_api_key,
-        exchanges=["XNYS"],
-        stock_limit=int(cli_args.stock_limit),
+    data_version = open_latest_snapshot(
+        memory_limit=cli_args.duckdb_memory_limit, threads=cli_args.duckdb_threads
+    )
+    plot(
+        data_version,
+        cache_ttl=cli_args.cache_ttl,
+        live_feed=cli_args.live_feed,
+        polygon_key=cli_args.polygon_api_key,
     )
-    plot(cli_args.polygon_api_key)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+# SPDX-FileCopyrightText: 2025-present U.N. Owen <void@some.where>
+#
+# SPDX-License-Identifier: MIT
+import tracemalloc
+
+import pytest
+
+from hedge_it.commons.utils.instrumentation import current_rss
+
+
+def sizes(*sizes: tuple, max_rows: int) -> list:
+    """(tickers, days) params, marked slow (opt-in) past `max_rows` rows."""
+    return [
+        pytest.param(
+            (tickers, days),
+            id=f"{tickers}x{days}",
+            marks=pytest.mark.slow if tickers * days > max_rows else (),
+        )
+        for tickers, days in sizes
+    ]
+
+
+def run_stage(benchmark, func, *args, **kwargs):
+    """
+    Time one call of `func` under `benchmark`, then call it again traced.
+
+    Two memory numbers land in the extra info: `rss_delta_mib`, the change of
+    the process RSS over the timed call (Arrow and DuckDB included), and
+    `peak_mib`, the peak of the Python heap over the traced call (numpy and
+    pandas buffers included, Arrow and DuckDB not). Tracing slows the call
+    down, so it is not the timed one. Stages are run once, they rebuild the
+    tables of the stage before.
+    """
+    rss_before = current_rss()
+    result = benchmark.pedantic(func, args=args, kwargs=kwargs, rounds=1)
+    if rss_before is not None:
+        benchmark.extra_info["rss_delta_mib"] = round(
+            (current_rss() - rss_before) / 2**20, 1
+        )
+    del result
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        benchmark.extra_info["peak_mib"] = round(
+            tracemalloc.get_traced_memory()[1] / 2**20, 1
+        )
+    finally:
+        tracemalloc.stop()
+    return result
@@ -0,0 +1,57 @@
+"""
+Parsing raw Yahoo chart payloads on threads against a process pool, with
+pytest-benchmark. Payloads are synthetic and already in memory, so only the
+JSON -> Arrow parsing and the hand-off to the parent are timed; `peak_mib`
+only covers the parent. Only 500 tickers run by default, the larger sizes are
+marked slow: run every size with `-m ''`.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from hedge_it.commons import chunked_iterable
+from hedge_it.processor.chart_parser import parse_chart_batch, read_chart_batches
+from tests.benchmarks import run_stage, sizes
+from tests.synthetic import chart_payloads, wide_history
+
+CHUNK_SIZE = 50
+
+
+@pytest.fixture(
+    scope="module", params=sizes((500, 250), (2000, 250), (8000, 250), max_rows=125_000)
+)
+def size(request) -> tuple:
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def batches(size) -> list:
+    payloads = chart_payloads(wide_history(*size))
+    return [
+        [(ticker, payloads[ticker]) for ticker in batch]
+        for batch in chunked_iterable(list(payloads), CHUNK_SIZE)
+    ]
+
+
+def parse(executor_class, workers: int, batches: list):
+    kwargs = {"max_workers": workers}
+    if executor_class is ProcessPoolExecutor:
+        kwargs["mp_context"] = multiprocessing.get_context("spawn")
+    with executor_class(**kwargs) as executor:
+        return read_chart_batches(list(executor.map(parse_chart_batch, batches)))
+
+
+@pytest.mark.parametrize("workers", sorted({1, 4, os.cpu_count()}))
+@pytest.mark.parametrize(
+    "executor_class",
+    [
+        pytest.param(ThreadPoolExecutor, id="threads"),
+        pytest.param(ProcessPoolExecutor, id="processes"),
+    ],
+)
+def test_chart_parsing(benchmark, size, batches, executor_class, workers):
+    ticker_df = run_stage(benchmark, parse, executor_class, workers, batches)
+    assert len(ticker_df) == size[0] * size[1]
@@ -0,0 +1,66 @@
+"""
+Startup cost of the hedge_it entry points, with pytest-benchmark.
+
+Each entry point runs in a fresh interpreter, so the timing is the whole
+startup. A further run under `python -X importtime` keeps the slowest
+third-party imports in the extra info, and the CLI is checked to parse its
+arguments without pulling in the data and dashboard stacks:
+
+    pytest tests/benchmarks/test_import_time.py --benchmark-columns=min,mean
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src")
+
+ENTRY_POINTS = {
+    "cli parse": [
+        "-c",
+        "from hedge_it.commons import CliArgParser;"
+        "CliArgParser().common_parser.parse_args(['ingest', '-pak', 'key'])",
+    ],
+    "ingestion": ["-c", "import hedge_it.ingestion"],
+    "dashboard": ["-c", "import hedge_it.start"],
+}
+
+# Deferred until a subcommand actually runs.
+HEAVY_PACKAGES = {"pandas", "numpy", "duckdb", "yfinance", "streamlit", "plotly"}
+
+
+def run(args: list, importtime: bool = False) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": SRC_DIR}
+    flags = ["-X", "importtime"] if importtime else []
+    return subprocess.run(
+        [sys.executable, *flags, *args], env=env, capture_output=True, text=True
+    )
+
+
+def imported_packages(stderr: str) -> dict:
+    """Top level third-party package -> cumulative import seconds."""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        module = module.strip()
+        if "." not in module and not module.startswith(("_", "hedge_it", "site")):
+            imports[module] = int(cumulative) / 1e6
+    return imports
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+def test_import_time(benchmark, entry_point):
+    entry_args = ENTRY_POINTS[entry_point]
+    result = benchmark.pedantic(run, args=(entry_args,), rounds=3)
+    assert result.returncode == 0, result.stderr
+
+    imports = imported_packages(run(entry_args, importtime=True).stderr)
+    benchmark.extra_info["slowest_imports"] = dict(
+        sorted(imports.items(), key=lambda item: item[1], reverse=True)[:5]
+    )
+    if entry_point.startswith("cli"):
+        assert not HEAVY_PACKAGES & imports.keys()
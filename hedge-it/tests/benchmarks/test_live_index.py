@@ -0,0 +1,65 @@
+"""
+Ticks per second the intraday index sustains on one core, with
+pytest-benchmark.
+
+Batches from the simulated quote feed are generated up front and applied to a
+`LiveIndex` over 100 and 500 slots, so only `apply` is timed. The level after
+the run is checked against a full recompute, with the periodic resync held
+off, and the throughput and drift are kept in the extra info.
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from hedge_it.connectors.quote_feed import SimulatedFeed
+from hedge_it.processor.live_index import LiveIndex
+
+TICKS = 1_000_000
+BATCH_SIZE = 250
+
+
+def live_index(constituents: int, resync_ticks: int, seed: int = 0) -> LiveIndex:
+    rng = np.random.default_rng(seed)
+    reference = rng.uniform(10, 500, constituents)
+    closes = reference * rng.lognormal(0, 0.05, constituents)
+    divisor = constituents / reference.mean()
+    return LiveIndex(
+        [f"T{i:05d}" for i in range(constituents)],
+        reference,
+        closes,
+        divisor,
+        resync_ticks=resync_ticks,
+    )
+
+
+def apply_all(live: LiveIndex, batches: list) -> float:
+    for ticks in batches:
+        live.apply(ticks)
+    return live.level
+
+
+@pytest.mark.parametrize("constituents", [100, 500])
+def test_live_index_apply(benchmark, constituents):
+    # No resync within the run, the drift is the running sum's own.
+    live = live_index(constituents, resync_ticks=TICKS + 1)
+    feed = SimulatedFeed(
+        live.tickers,
+        live.prices.tolist(),
+        ticks_per_second=0,
+        batch_size=BATCH_SIZE,
+        seed=0,
+    )
+    batches = list(itertools.islice(feed, TICKS // BATCH_SIZE))
+
+    level = benchmark.pedantic(apply_all, args=(live, batches), rounds=1)
+
+    drift = abs(level / float(live.prices @ live.weights) - 1)
+    assert live.ticks == TICKS
+    assert drift < 1e-9
+    benchmark.extra_info["drift"] = drift
+    if benchmark.stats is not None:
+        benchmark.extra_info["ticks_per_second"] = round(
+            TICKS / benchmark.stats.stats.mean
+        )
@@ -0,0 +1,121 @@
+"""
+Time and peak memory of each fetch -> process -> persist -> index stage, with
+pytest-benchmark, for 100 to 10000 tickers over 30 to 2500 days.
+
+Polygon and Yahoo are replaced by in-memory stand-ins serving synthetic
+history and DuckDB runs on a throwaway database per size, so the numbers only
+cover our own code. The stages of a size share its database and run in file
+order, as they build on the tables of the stage before. Every stage checks the
+rows it produced and records its memory in the extra info (see `run_stage`);
+timings are compared against a saved run rather than fixed budgets. Sizes
+past 25k rows are marked slow and only run on request, `-m slow` for them
+alone or `-m ''` for the full matrix; the largest (10000 x 2500) needs
+several GB of RAM:
+
+    pytest tests/benchmarks -m '' --benchmark-autosave
+    pytest tests/benchmarks -m '' --benchmark-compare
+"""
+
+import os
+from unittest import mock
+
+import pytest
+
+from hedge_it.commons.constants import INDEX_NAME, STOCKS, TABLE_ANALYTICS, TABLE_TOPM
+from hedge_it.connectors.fetcher import fetch_stocks
+from hedge_it.processor.duck_connection import configure_duckdb, duckconn
+from hedge_it.processor.duck_db import (
+    get_composition_changes,
+    persist_index_analytics,
+    persist_index_table,
+    persist_indices,
+    persist_stock_history,
+    persist_top_mcap,
+)
+from hedge_it.processor.ticker_processor import process_ticker_data
+from tests.benchmarks import run_stage, sizes
+from tests.synthetic import FakeYahoo, polygon_listing, ticker_shares, wide_history
+
+TOP_N = 100
+
+
+def row_count(table_name: str) -> int:
+    return duckconn().execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+
+
+@pytest.fixture(
+    scope="module",
+    params=sizes(
+        *[
+            (tickers, days)
+            for days in [30, 250, 2500]
+            for tickers in [100, 2000, 10000]
+        ],
+        max_rows=25_000,
+    ),
+)
+def pipeline(request, module_duckdb_dir):
+    """Synthetic inputs of a size and the outputs handed from one stage to the next."""
+    tickers, days = request.param
+    configure_duckdb(os.path.join(module_duckdb_dir, f"stocks_{tickers}_{days}"))
+    return {
+        "tickers": tickers,
+        "days": days,
+        # Business days back to calendar days, with margin, so TopMcap sees them all.
+        "lookback": days * 2,
+        "wide": wide_history(tickers, days),
+        "shares": ticker_shares(tickers),
+    }
+
+
+def test_fetch_stocks(benchmark, pipeline):
+    tickers = pipeline["tickers"]
+    with mock.patch(
+        "hedge_it.connectors.ticker_listing.ticker_by_exchange",
+        return_value=polygon_listing(tickers),
+    ), mock.patch("yfinance.Ticker", FakeYahoo(pipeline["wide"], pipeline["shares"])):
+        ticker_stocks = run_stage(
+            benchmark,
+            fetch_stocks,
+            "fake",
+            stock_limit=tickers,
+            lookback=pipeline["lookback"],
+        )
+    # Wide yfinance frame, one row per day and a column per (field, ticker).
+    assert ticker_stocks.shape == pipeline["wide"].shape
+
+
+def test_process_ticker_data(benchmark, pipeline):
+    ticker_df = run_stage(benchmark, process_ticker_data, pipeline.pop("wide"))
+    assert len(ticker_df) == pipeline["tickers"] * pipeline["days"]
+    pipeline["ticker_df"] = ticker_df
+
+
+def test_persist_stock_history(benchmark, pipeline):
+    run_stage(benchmark, persist_stock_history, pipeline.pop("ticker_df"))
+    assert row_count(STOCKS) == pipeline["tickers"] * pipeline["days"]
+
+
+def test_persist_top_mcap(benchmark, pipeline):
+    run_stage(benchmark, persist_top_mcap, TOP_N, lookback=pipeline["lookback"])
+    assert row_count(TABLE_TOPM) == min(TOP_N, pipeline["tickers"]) * pipeline["days"]
+
+
+def test_persist_index_table(benchmark, pipeline):
+    run_stage(benchmark, persist_index_table)
+    assert row_count('"index"') == pipeline["days"]
+
+
+def test_persist_index_analytics(benchmark, pipeline):
+    run_stage(benchmark, persist_index_analytics)
+    assert row_count(TABLE_ANALYTICS) == pipeline["days"]
+
+
+def test_persist_indices(benchmark, pipeline):
+    indices = run_stage(benchmark, persist_indices, lookback=pipeline["lookback"])
+    assert (indices.groupby(INDEX_NAME).size() == pipeline["days"]).all()
+
+
+def test_composition_changes(benchmark, pipeline):
+    changes = run_stage(benchmark, get_composition_changes)
+    assert len(changes) <= pipeline["days"]
@@ -0,0 +1,49 @@
+"""
+The wide-to-long reshape of `process_ticker_data` against the previous
+melt + merge implementation, with pytest-benchmark:
+
+    pytest tests/benchmarks/test_reshape.py --benchmark-group-by=param:size
+
+Only 500 tickers run by default, the larger sizes are marked slow: run
+every size with `-m ''`.
+"""
+
+from functools import reduce
+
+import pandas as pd
+import pytest
+
+from hedge_it.commons.constants import CLOSE, DATE, HIGH, LOW, OPEN, TICKER, VOLUME
+from hedge_it.processor.ticker_processor import process_ticker_data
+from tests.benchmarks import run_stage, sizes
+from tests.synthetic import wide_history
+
+
+def melt_merge_reshape(ticker_stocks: pd.DataFrame) -> pd.DataFrame:
+    melted_dfs = [
+        ticker_stocks[col]
+        .reset_index()
+        .melt(id_vars=[DATE], var_name=TICKER, value_name=col)
+        for col in [OPEN, CLOSE, LOW, HIGH, VOLUME]
+    ]
+    return reduce(
+        lambda left, right: pd.merge(left, right, on=[DATE, TICKER]), melted_dfs
+    )
+
+
+@pytest.mark.parametrize(
+    "size", sizes((500, 250), (2000, 250), (8000, 250), max_rows=125_000)
+)
+@pytest.mark.parametrize(
+    "reshape",
+    [
+        pytest.param(melt_merge_reshape, id="melt_merge"),
+        pytest.param(process_ticker_data, id="stack"),
+    ],
+)
+def test_reshape(benchmark, size, reshape):
+    tickers, days = size
+    wide = wide_history(tickers, days)
+    long_df = run_stage(benchmark, reshape, wide)
+    assert len(long_df) == tickers * days
+    assert long_df[CLOSE].sum() == pytest.approx(wide[CLOSE].to_numpy().sum())
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from hedge_it.connectors.rate_limit import configure_yahoo_limiter
+from hedge_it.processor.duck_connection import configure_duckdb
+
+
+@pytest.fixture
+def duckdb_dir(tmp_path, monkeypatch):
+    """
+    Process wide DuckDB on a throwaway database in `tmp_path`, also the working
+    directory, so caches and snapshots written next to it are thrown away too.
+    """
+    monkeypatch.chdir(tmp_path)
+    configure_duckdb(os.path.join(tmp_path, "stocks"))
+    yield tmp_path
+    configure_duckdb()
+
+
+@pytest.fixture(scope="module")
+def module_duckdb_dir(tmp_path_factory):
+    """`duckdb_dir` shared by the tests of a module."""
+    workdir = tmp_path_factory.mktemp("duckdb")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    configure_duckdb(os.path.join(workdir, "stocks"))
+    # In-memory stand-ins never throttle, keep the limiter out of the way.
+    configure_yahoo_limiter(10**6, os.path.join(workdir, "limiter.sqlite"))
+    yield workdir
+    configure_duckdb()
+    os.chdir(cwd)
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from hedge_it.commons.constants import (
+    CLOSE,
+    DATE,
+    DISPLAY_NAME,
+    HIGH,
+    INDUSTRY,
+    LOW,
+    OPEN,
+    SECTOR,
+    SHARES,
+    TICKER,
+    VOLUME,
+)
+
+FIELDS = [CLOSE, HIGH, LOW, OPEN, VOLUME]
+
+
+def ticker_names(ticker_count: int) -> list:
+    return [f"T{i:05d}" for i in range(ticker_count)]
+
+
+def wide_history(ticker_count: int, day_count: int, seed: int = 0) -> pd.DataFrame:
+    """yfinance shaped history: DatetimeIndex `Date`, (Price, Ticker) columns."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=day_count)
+    close = 100 * np.exp(
+        np.cumsum(rng.normal(0, 0.02, (day_count, ticker_count)), axis=0)
+    )
+    blocks = {
+        CLOSE: close,
+        HIGH: close * 1.01,
+        LOW: close * 0.99,
+        OPEN: close * (1 + rng.normal(0, 0.005, close.shape)),
+        VOLUME: rng.integers(1_000, 1_000_000, close.shape).astype(np.float64),
+    }
+    columns = pd.MultiIndex.from_product(
+        [FIELDS, ticker_names(ticker_count)], names=["Price", "Ticker"]
+    )
+    return pd.DataFrame(
+        np.hstack([blocks[field] for field in FIELDS]),
+        index=pd.DatetimeIndex(dates, name=DATE),
+        columns=columns,
+    )
+
+
+def ticker_shares(ticker_count: int, seed: int = 0) -> pd.DataFrame:
+    """Fundamentals shaped like `fetch_stocks` returns them."""
+    rng = np.random.default_rng(seed)
+    names = ticker_names(ticker_count)
+    return pd.DataFrame(
+        {
+            SHARES: rng.integers(10**6, 10**10, ticker_count).astype(np.float64),
+            INDUSTRY: "Industry",
+            SECTOR: [f"Sector{i % 11}" for i in range(ticker_count)],
+            DISPLAY_NAME: names,
+            TICKER: names,
+        }
+    )
+
+
+def polygon_listing(ticker_count: int, exchange: str = "XNYS") -> list:
+    """Polygon reference tickers results."""
+    return [
+        {"ticker": ticker, "primary_exchange": exchange}
+        for ticker in ticker_names(ticker_count)
+    ]
+
+
+class FakeYahoo:
+    """
+    Stand-in for `yf.Ticker` serving `wide` history and `shares` fundamentals
+    without any network calls.
+    """
+
+    def __init__(self, wide: pd.DataFrame, shares: pd.DataFrame):
+        self._history = {
+            ticker: frame.T.droplevel("Ticker", axis=1).tz_localize("America/New_York")
+            for ticker, frame in wide.T.groupby(level="Ticker")
+        }
+        self._info = {
+            row[TICKER]: {
+                "sharesOutstanding": row[SHARES],
+                "industry": row[INDUSTRY],
+                "sector": row[SECTOR],
+                "displayName": row[DISPLAY_NAME],
+            }
+            for row in shares.to_dict("records")
+        }
+
+    def __call__(self, ticker, session=None):
+        return _FakeTicker(self, ticker)
+
+
+class _FakeTicker:
+    def __init__(self, yahoo: FakeYahoo, ticker: str):
+        self._yahoo = yahoo
+        self.ticker = ticker
+
+    @property
+    def info(self) -> dict:
+        return self._yahoo._info.get(self.ticker, {})
+
+    def history(self, period=None, start=None, timeout=None) -> pd.DataFrame:
+        history = self._yahoo._history.get(self.ticker, pd.DataFrame())
+        if start is not None and not history.empty:
+            history = history[history.index.tz_localize(None) >= pd.Timestamp(start)]
+        return history.copy()
+
+
+def chart_payloads(wide: pd.DataFrame) -> dict:
+    """Yahoo chart JSON per ticker carrying `wide` history."""
+    from hedge_it.processor.chart_parser import chart_payload
+
+    return {
+        ticker: chart_payload(ticker, history)
+        for ticker, history in FakeYahoo(
+            wide, pd.DataFrame(columns=[TICKER])
+        )._history.items()
+    }
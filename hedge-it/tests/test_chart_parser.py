@@ -0,0 +1,110 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from hedge_it.commons.constants import CLOSE, DATE, HIGH, LOW, OPEN, TICKER, VOLUME
+from hedge_it.processor.chart_parser import (
+    CHART_SCHEMA,
+    _chart_columns,
+    parse_chart,
+    parse_chart_batch,
+    read_chart_batches,
+)
+from hedge_it.processor.ticker_processor import process_ticker_data
+from tests.synthetic import chart_payloads, wide_history
+
+# 2025-01-06 and 2025-01-07 at 21:00 New York, already the next day in UTC.
+TIMESTAMPS = [1736215200, 1736301600, 1736388000]
+NEW_YORK = -5 * 3600
+
+
+def payload(quote: dict, adjclose: list = None, gmtoffset: int = NEW_YORK) -> bytes:
+    indicators = {"quote": [quote]}
+    if adjclose is not None:
+        indicators["adjclose"] = [{"adjclose": adjclose}]
+    return json.dumps(
+        {
+            "chart": {
+                "result": [
+                    {
+                        "meta": {
+                            "gmtoffset": gmtoffset,
+                            "exchangeTimezoneName": "America/New_York",
+                        },
+                        "timestamp": TIMESTAMPS,
+                        "indicators": indicators,
+                    }
+                ]
+            }
+        }
+    ).encode()
+
+
+QUOTE = {
+    "open": [10.0, 18.0, 30.0],
+    "high": [12.0, 22.0, 31.0],
+    "low": [8.0, 17.0, 29.0],
+    "close": [10.0, 20.0, None],
+    "volume": [100, None, 300],
+}
+
+
+def test_prices_are_adjusted_by_the_adjclose_ratio():
+    _, columns = _chart_columns(payload(QUOTE, adjclose=[9.0, 20.0, None]))
+
+    # Ratio 0.9 on the first bar, 1 on the second, the bar without a Close dropped.
+    assert columns[OPEN].tolist() == pytest.approx([9.0, 18.0])
+    assert columns[HIGH].tolist() == pytest.approx([10.8, 22.0])
+    assert columns[LOW].tolist() == pytest.approx([7.2, 17.0])
+    assert columns[CLOSE].tolist() == pytest.approx([9.0, 20.0])
+    assert columns[VOLUME].tolist() == [100, 0]
+
+
+def test_prices_are_kept_without_adjclose():
+    _, columns = _chart_columns(payload(QUOTE))
+    assert columns[CLOSE].tolist() == pytest.approx([10.0, 20.0])
+
+
+def test_bars_are_dated_by_their_exchange_day():
+    timezone, columns = _chart_columns(payload(QUOTE))
+    assert timezone == "America/New_York"
+    assert (
+        columns[DATE].tolist()
+        == pd.to_datetime(["2025-01-06", "2025-01-07"]).asi8.tolist()
+    )
+
+    _, utc = _chart_columns(payload(QUOTE, gmtoffset=0))
+    assert (
+        utc[DATE].tolist() == pd.to_datetime(["2025-01-07", "2025-01-08"]).asi8.tolist()
+    )
+
+
+def test_payload_without_bars():
+    empty = json.dumps({"chart": {"result": [{"meta": {}}]}}).encode()
+    assert _chart_columns(empty) == (None, None)
+    assert parse_chart(empty).empty
+
+
+def test_batch_round_trips_through_arrow_ipc():
+    wide = wide_history(3, 5)
+    payloads = chart_payloads(wide)
+    buffer = parse_chart_batch(list(payloads.items()))
+
+    table = pa.ipc.open_stream(buffer).read_all()
+    assert table.schema == CHART_SCHEMA
+    rows = table.to_pandas()
+    assert rows.groupby(TICKER, observed=True).size().to_dict() == {
+        ticker: 5 for ticker in payloads
+    }
+
+    expected = process_ticker_data(wide).sort_values([TICKER, DATE])
+    parsed = read_chart_batches([buffer, parse_chart_batch([])])
+    parsed[TICKER] = parsed[TICKER].astype(str)
+    for col in [OPEN, CLOSE, LOW, HIGH]:
+        assert np.allclose(parsed[col], expected[col], rtol=1e-6)
+    assert parsed[VOLUME].tolist() == expected[VOLUME].astype(np.int64).tolist()
+    assert parsed[DATE].tolist() == expected[DATE].tolist()
+    assert parsed[TICKER].tolist() == expected[TICKER].tolist()
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from hedge_it.commons.constants import DATE, ENTERED, EXITED, TABLE_TOPM, TICKER
+from hedge_it.processor.duck_connection import duckwriter
+from hedge_it.processor.duck_db import get_composition_changes
+
+DATES = pd.bdate_range("2025-01-06", periods=4)
+
+
+@pytest.fixture
+def top_mcap(duckdb_dir):
+    """A and B held for two days, B swapped for C on the third, A dropped on the fourth."""
+    members = {0: ["A", "B"], 1: ["A", "B"], 2: ["A", "C"], 3: ["C"]}
+    top_df = pd.DataFrame(
+        [
+            (DATES[day], ticker)
+            for day, tickers in members.items()
+            for ticker in tickers
+        ],
+        columns=[DATE, TICKER],
+    )
+    with duckwriter() as conn:
+        conn.register("top_df", top_df)
+        conn.execute(f"CREATE TABLE {TABLE_TOPM} AS SELECT * FROM top_df")
+        conn.unregister("top_df")
+
+
+def test_first_date_lists_the_initial_constituents(top_mcap):
+    first = get_composition_changes().iloc[0]
+    assert first[DATE] == DATES[0]
+    assert list(first[ENTERED]) == ["A", "B"]
+    assert list(first[EXITED]) == []
+
+
+def test_only_dates_with_changes_are_listed(top_mcap):
+    changes = get_composition_changes()
+    assert changes[DATE].tolist() == [DATES[0], DATES[2], DATES[3]]
+    assert changes[ENTERED].map(list).tolist() == [["A", "B"], ["C"], []]
+    assert changes[EXITED].map(list).tolist() == [[], ["B"], ["A"]]
@@ -0,0 +1,21 @@
+import json
+import os
+
+from hedge_it.connectors.data_source import (
+    MANIFEST_FILE,
+    RecordingSource,
+    ReplaySource,
+)
+
+
+def test_recording_keeps_the_first_recording_date(tmp_path):
+    fixtures_dir = str(tmp_path)
+    RecordingSource(fixtures_dir)
+    manifest_file = os.path.join(fixtures_dir, MANIFEST_FILE)
+    with open(manifest_file, "w") as f:
+        json.dump({"recorded_on": "2025-01-06"}, f)
+
+    RecordingSource(fixtures_dir)
+    with open(manifest_file) as f:
+        assert json.load(f) == {"recorded_on": "2025-01-06"}
+    assert ReplaySource(fixtures_dir).shift.days % 7 == 0
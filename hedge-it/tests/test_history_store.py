@@ -0,0 +1,38 @@
+import os
+
+from hedge_it.commons.constants import DATE, TICKER
+from hedge_it.processor.duck_connection import duckconn
+from hedge_it.processor.duck_db import persist_fundamentals, persist_stock_history
+from hedge_it.processor.history_store import export_history, history_source
+from hedge_it.processor.ticker_processor import process_ticker_data
+from tests.synthetic import ticker_shares, wide_history
+
+TICKERS = 4
+DAYS = 120
+
+
+def test_incremental_export_keeps_backfilled_history(duckdb_dir):
+    history_dir = os.path.join(duckdb_dir, "history")
+    persist_fundamentals(ticker_shares(TICKERS))
+    history = process_ticker_data(wide_history(TICKERS, DAYS))
+    newcomer = "T00003"
+    split = history[DATE].drop_duplicates().sort_values().iat[DAYS - 5]
+
+    persist_stock_history(
+        history[(history[DATE] < split) & (history[TICKER] != newcomer)]
+    )
+    export_history(history_dir=history_dir)
+
+    # The newcomer comes with months of history before the last persisted date.
+    delta = history[(history[DATE] >= split) | (history[TICKER] == newcomer)]
+    persist_stock_history(delta, incremental=True)
+    export_history(history_dir=history_dir, since=delta[DATE].min())
+
+    counts = dict(
+        duckconn()
+        .execute(
+            f"SELECT {TICKER}, COUNT(*) FROM {history_source(history_dir)} GROUP BY {TICKER}"
+        )
+        .fetchall()
+    )
+    assert counts == {ticker: DAYS for ticker in history[TICKER].unique()}
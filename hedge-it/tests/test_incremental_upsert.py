@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from hedge_it.commons.constants import CLOSE, DATE, TABLE_PRICES, TICKER
+from hedge_it.processor.duck_connection import duckconn
+from hedge_it.processor.duck_db import (
+    latest_stock_dates,
+    persist_fundamentals,
+    persist_stock_history,
+)
+from hedge_it.processor.ticker_processor import process_ticker_data
+from tests.synthetic import ticker_shares, wide_history
+
+TICKERS = 5
+DAYS = 10
+
+
+@pytest.fixture
+def history(duckdb_dir) -> pd.DataFrame:
+    persist_fundamentals(ticker_shares(TICKERS))
+    return process_ticker_data(wide_history(TICKERS, DAYS))
+
+
+def stored_prices() -> pd.DataFrame:
+    return (
+        duckconn()
+        .execute(f"SELECT * FROM {TABLE_PRICES} ORDER BY {TICKER}, {DATE}")
+        .fetch_df()
+    )
+
+
+def test_latest_stock_dates_empty_before_first_run(duckdb_dir):
+    assert latest_stock_dates() == {}
+
+
+def test_incremental_run_upserts_the_delta(history):
+    dates = history[DATE].drop_duplicates().sort_values()
+    first_run = history[history[DATE] < dates.iat[-2]]
+    persist_stock_history(first_run)
+    assert len(stored_prices()) == TICKERS * (DAYS - 2)
+
+    # The second run refetches the last persisted (partial) bar and a new day.
+    delta = history[history[DATE] >= dates.iat[-3]].copy()
+    delta[CLOSE] += 1
+    persist_stock_history(delta, incremental=True)
+
+    prices = stored_prices()
+    assert len(prices) == TICKERS * DAYS
+    assert not prices.duplicated([TICKER, DATE]).any()
+    refreshed = prices[prices[DATE] >= dates.iat[-3]]
+    assert refreshed[CLOSE].tolist() == pytest.approx(
+        delta.sort_values([TICKER, DATE])[CLOSE].tolist(), rel=1e-6
+    )
+    untouched = prices[prices[DATE] < dates.iat[-3]]
+    expected = history[history[DATE] < dates.iat[-3]].sort_values([TICKER, DATE])
+    assert untouched[CLOSE].tolist() == pytest.approx(
+        expected[CLOSE].tolist(), rel=1e-6
+    )
+
+
+def test_incremental_run_matches_full_rebuild(history):
+    dates = history[DATE].drop_duplicates().sort_values()
+    persist_stock_history(history[history[DATE] < dates.iat[DAYS // 2]])
+    persist_stock_history(
+        history[history[DATE] >= dates.iat[DAYS // 2]], incremental=True
+    )
+    incremental = stored_prices()
+
+    persist_stock_history(history)
+    pd.testing.assert_frame_equal(incremental, stored_prices())
+
+
+def test_latest_stock_dates_per_ticker(history):
+    last_day = history[DATE].max()
+    persist_stock_history(
+        history[~((history[TICKER] == "T00000") & (history[DATE] == last_day))]
+    )
+
+    latest = latest_stock_dates()
+    assert len(latest) == TICKERS
+    assert pd.Timestamp(latest["T00001"]) == last_day
+    assert pd.Timestamp(latest["T00000"]) < last_day
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hedge_it.commons.constants import (
+    CUMULATIVE_RETURN,
+    DAILY_RETURN,
+    DATE,
+    DRAWDOWN,
+    EQUAL_WEIGHTED_INDEX,
+    MONTHLY_RETURN,
+    ROLLING_VOLATILITY,
+    STOCK_COUNT,
+    TABLE_TOPM,
+    TICKER,
+    TURNOVER,
+    WEEKLY_RETURN,
+)
+from hedge_it.processor.duck_connection import duckwriter
+from hedge_it.processor.duck_db import persist_index_analytics, query_index_analytics
+
+DAYS = 40
+DATES = pd.bdate_range("2025-01-06", periods=DAYS)
+SWAP, RETURN = 10, 25
+
+
+def members(day: int) -> list:
+    """A to D, D swapped for E on day `SWAP` and back in for E on day `RETURN`."""
+    return ["A", "B", "C", "E" if SWAP <= day < RETURN else "D"]
+
+
+def create_table(conn, table_name: str, frame: pd.DataFrame):
+    conn.register("frame", frame)
+    conn.execute(f'CREATE TABLE "{table_name}" AS SELECT * FROM frame')
+    conn.unregister("frame")
+
+
+@pytest.fixture
+def levels(duckdb_dir) -> pd.Series:
+    levels = pd.Series(
+        100 * np.cumprod(1 + np.random.default_rng(0).normal(0, 0.02, DAYS)),
+        index=DATES,
+    )
+    with duckwriter() as conn:
+        create_table(
+            conn,
+            TABLE_TOPM,
+            pd.DataFrame(
+                [(DATES[day], t) for day in range(DAYS) for t in members(day)],
+                columns=[DATE, TICKER],
+            ),
+        )
+        create_table(
+            conn,
+            "index",
+            pd.DataFrame(
+                {DATE: DATES, STOCK_COUNT: 4, EQUAL_WEIGHTED_INDEX: levels.values}
+            ),
+        )
+    persist_index_analytics()
+    return levels
+
+
+def test_returns_over_trailing_trading_days(levels):
+    analytics = query_index_analytics().set_index(DATE)
+    assert len(analytics) == DAYS
+
+    expected = {
+        DAILY_RETURN: levels / levels.shift(1) - 1,
+        WEEKLY_RETURN: levels / levels.shift(5) - 1,
+        MONTHLY_RETURN: levels / levels.shift(21) - 1,
+        CUMULATIVE_RETURN: levels / levels.iat[0] - 1,
+        DRAWDOWN: levels / levels.cummax() - 1,
+    }
+    for column, values in expected.items():
+        pd.testing.assert_series_equal(
+            analytics[column], values * 100, check_names=False, check_freq=False
+        )
+    assert analytics[WEEKLY_RETURN].isna().sum() == 5
+    assert analytics[MONTHLY_RETURN].isna().sum() == 21
+
+
+def test_volatility_is_annualized_over_21_days(levels):
+    analytics = query_index_analytics().set_index(DATE)
+    daily = levels.pct_change()
+    expected = daily.rolling(21, min_periods=2).std() * np.sqrt(252) * 100
+    pd.testing.assert_series_equal(
+        analytics[ROLLING_VOLATILITY], expected, check_names=False, check_freq=False
+    )
+    # Past the first 21 days the window drops the oldest return.
+    assert analytics[ROLLING_VOLATILITY].iat[-1] == pytest.approx(
+        daily.iloc[-21:].std() * np.sqrt(252) * 100
+    )
+
+
+def test_turnover_is_the_share_of_constituents_entered(levels):
+    turnover = query_index_analytics().set_index(DATE)[TURNOVER]
+    assert np.isnan(turnover.iat[0])
+    # E enters on the swap, D re-enters after an absence.
+    assert turnover.iat[SWAP] == pytest.approx(25)
+    assert turnover.iat[RETURN] == pytest.approx(25)
+    others = turnover.drop(DATES[[0, SWAP, RETURN]])
+    assert (others == 0).all()
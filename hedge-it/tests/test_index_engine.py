@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hedge_it.commons.constants import (
+    CLOSE,
+    SHARES,
+    DATE,
+    DIVISOR,
+    EQUAL_WEIGHTED_INDEX,
+    M_CAP,
+    REBALANCE_DATE,
+    STOCK_COUNT,
+    TABLE_TOPM,
+    TICKER,
+    VALUE,
+)
+from hedge_it.processor.duck_connection import duckconn
+from hedge_it.processor.duck_db import (
+    get_stock_composition,
+    persist_fundamentals,
+    persist_index_table,
+    persist_stock_history,
+    persist_top_mcap,
+)
+from hedge_it.processor.index_engine import divisor_index
+from hedge_it.processor.ticker_processor import process_ticker_data
+from tests.synthetic import ticker_shares, wide_history
+
+TICKERS = 12
+DAYS = 60
+TOP_N = 4
+LOOKBACK = DAYS * 2
+
+DATES = pd.bdate_range("2025-01-06", periods=4)
+
+
+def long_frame(values: dict, column: str) -> pd.DataFrame:
+    """(Date, Ticker, `column`) rows from ticker -> one value per date in DATES."""
+    return pd.DataFrame(
+        [
+            (day, ticker, value)
+            for ticker, series in values.items()
+            for day, value in zip(DATES, series)
+            if value is not None
+        ],
+        columns=[DATE, TICKER, column],
+    )
+
+
+@pytest.fixture
+def rebalanced():
+    """A and B held for two days, B swapped for C on the third."""
+    closes = long_frame(
+        {"A": [10, 11, 12, 12], "B": [20, 22, 20, 20], "C": [5, 5, 5, 6]}, CLOSE
+    )
+    members = long_frame(
+        {"A": [1, 1, 1, 1], "B": [1, 1, None, None], "C": [None, None, 1, 1]}, "member"
+    )[[DATE, TICKER]]
+    return closes, members
+
+
+def test_divisor_index_is_continuous_across_a_rebalance(rebalanced):
+    index_df = divisor_index(*rebalanced)
+
+    # Starts at the mean close, the swap on day 3 keeps the level (A +20%, B
+    # flat since day 1), then C's +20% moves half the index.
+    assert index_df[EQUAL_WEIGHTED_INDEX].tolist() == pytest.approx(
+        [15, 16.5, 16.5, 18.15]
+    )
+    assert index_df[STOCK_COUNT].tolist() == [2, 2, 2, 2]
+    assert index_df[REBALANCE_DATE].tolist() == [DATES[0]] * 2 + [DATES[2]] * 2
+    assert index_df[DIVISOR].tolist() == pytest.approx([2 / 15] * 2 + [2 / 16.5] * 2)
+
+
+def test_divisor_index_resumes_from_base_level(rebalanced):
+    closes, members = rebalanced
+    full = divisor_index(closes, members)
+    resumed = divisor_index(
+        closes[closes[DATE] >= DATES[2]],
+        members[members[DATE] >= DATES[2]],
+        base_level=full[EQUAL_WEIGHTED_INDEX].iat[2],
+    )
+    assert resumed[EQUAL_WEIGHTED_INDEX].tolist() == pytest.approx(
+        full[EQUAL_WEIGHTED_INDEX].iloc[2:].tolist()
+    )
+
+
+def test_cap_weighted_index_has_no_divisor(rebalanced):
+    closes, members = rebalanced
+    closes[M_CAP] = closes[CLOSE] * 100
+    index_df = divisor_index(closes, members, cap_weighted=True)
+    assert index_df[DIVISOR].isna().all()
+    assert index_df[EQUAL_WEIGHTED_INDEX].iat[0] == pytest.approx(15)
+
+
+def stored_index() -> pd.DataFrame:
+    return duckconn().execute('SELECT * FROM "index" ORDER BY Date').fetch_df()
+
+
+@pytest.fixture
+def history(duckdb_dir) -> pd.DataFrame:
+    persist_fundamentals(ticker_shares(TICKERS))
+    return process_ticker_data(wide_history(TICKERS, DAYS))
+
+
+def test_incremental_resume_matches_full_rebuild(history):
+    dates = history[DATE].drop_duplicates().sort_values()
+    persist_stock_history(history[history[DATE] < dates.iat[DAYS // 2]])
+    persist_top_mcap(TOP_N, lookback=LOOKBACK)
+    persist_index_table()
+
+    persist_stock_history(
+        history[history[DATE] >= dates.iat[DAYS // 2]], incremental=True
+    )
+    persist_top_mcap(TOP_N, incremental=True, lookback=LOOKBACK)
+    persist_index_table(incremental=True)
+    resumed = stored_index()
+
+    persist_index_table()
+    rebuilt = stored_index()
+    assert rebuilt[REBALANCE_DATE].nunique() > 2
+    assert len(resumed) == len(rebuilt) == DAYS
+    pd.testing.assert_frame_equal(
+        resumed.drop(columns=[EQUAL_WEIGHTED_INDEX, DIVISOR]),
+        rebuilt.drop(columns=[EQUAL_WEIGHTED_INDEX, DIVISOR]),
+    )
+    assert np.allclose(resumed[EQUAL_WEIGHTED_INDEX], rebuilt[EQUAL_WEIGHTED_INDEX])
+    assert np.allclose(resumed[DIVISOR], rebuilt[DIVISOR])
+
+
+def stored_top_mcap() -> pd.DataFrame:
+    return (
+        duckconn()
+        .execute(f"SELECT * FROM {TABLE_TOPM} ORDER BY {DATE}, {TICKER}")
+        .fetch_df()
+    )
+
+
+def test_new_ticker_backfill_matches_full_rebuild(duckdb_dir):
+    shares = ticker_shares(TICKERS)
+    newcomer = shares[TICKER].iat[-1]
+    # Large enough to rank in the top N from the first day on.
+    shares.loc[shares[TICKER] == newcomer, SHARES] = 1e13
+    persist_fundamentals(shares)
+    history = process_ticker_data(wide_history(TICKERS, DAYS))
+    dates = history[DATE].drop_duplicates().sort_values()
+    split = dates.iat[DAYS // 2]
+
+    persist_stock_history(
+        history[(history[DATE] < split) & (history[TICKER] != newcomer)]
+    )
+    persist_top_mcap(TOP_N, lookback=LOOKBACK)
+    persist_index_table()
+
+    # The next run fetches the newcomer from the start of the lookback window.
+    delta = history[(history[DATE] >= split) | (history[TICKER] == newcomer)]
+    persist_stock_history(delta, incremental=True)
+    since = delta[DATE].min()
+    persist_top_mcap(TOP_N, incremental=True, lookback=LOOKBACK, since=since)
+    persist_index_table(incremental=True, since=since)
+    resumed_top, resumed = stored_top_mcap(), stored_index()
+
+    persist_top_mcap(TOP_N, lookback=LOOKBACK)
+    persist_index_table()
+    rebuilt_top, rebuilt = stored_top_mcap(), stored_index()
+
+    assert (
+        resumed_top.groupby(DATE)[TICKER].apply(set).map(lambda t: newcomer in t)
+    ).all()
+    pd.testing.assert_frame_equal(resumed_top, rebuilt_top)
+    pd.testing.assert_frame_equal(
+        resumed.drop(columns=[EQUAL_WEIGHTED_INDEX, DIVISOR]),
+        rebuilt.drop(columns=[EQUAL_WEIGHTED_INDEX, DIVISOR]),
+    )
+    assert np.allclose(resumed[EQUAL_WEIGHTED_INDEX], rebuilt[EQUAL_WEIGHTED_INDEX])
+
+
+def test_composition_values_sum_to_the_level(history):
+    persist_stock_history(history)
+    persist_top_mcap(TOP_N, lookback=LOOKBACK)
+    persist_index_table()
+
+    values = get_stock_composition().groupby(DATE)[VALUE].sum()
+    levels = stored_index().set_index(DATE)[EQUAL_WEIGHTED_INDEX]
+    assert np.allclose(values.reindex(levels.index), levels)
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hedge_it.commons.constants import (
+    CAP_WEIGHT,
+    CLOSE,
+    DATE,
+    INDEX_NAME,
+    LEVEL,
+    M_CAP,
+    SHARES,
+    STOCKS,
+    STOCK_COUNT,
+    TICKER,
+)
+from hedge_it.processor.duck_connection import duckconn
+from hedge_it.processor.duck_db import (
+    persist_fundamentals,
+    persist_indices,
+    persist_stock_history,
+    query_indices,
+)
+from hedge_it.processor.index_registry import IndexDefinition
+from hedge_it.processor.ticker_processor import process_ticker_data
+from tests.synthetic import ticker_shares, wide_history
+
+TICKERS = 12
+DAYS = 30
+TOP_N = 3
+DEFINITIONS = [
+    IndexDefinition("top3", TOP_N),
+    IndexDefinition("top3_cap", TOP_N, CAP_WEIGHT),
+]
+
+
+@pytest.fixture
+def stocks(duckdb_dir) -> pd.DataFrame:
+    shares = ticker_shares(TICKERS)
+    # Equal share counts rank by Close, whose random walks cross and rebalance.
+    shares[SHARES] = 1e9
+    persist_fundamentals(shares)
+    persist_stock_history(process_ticker_data(wide_history(TICKERS, DAYS)))
+    return (
+        duckconn()
+        .execute(f"SELECT {DATE}, {TICKER}, {CLOSE}, {M_CAP} FROM {STOCKS}")
+        .fetch_df()
+        .astype({CLOSE: np.float64, M_CAP: np.float64})
+    )
+
+
+def top_members(stocks: pd.DataFrame) -> dict:
+    """Date -> the TOP_N tickers by MCap."""
+    return {
+        day: frozenset(rows.nlargest(TOP_N, M_CAP)[TICKER])
+        for day, rows in stocks.groupby(DATE)
+    }
+
+
+def expected_levels(stocks: pd.DataFrame, cap_weighted: bool) -> list:
+    """
+    Buy the members at each change of the set, weighted equally or by MCap,
+    and hold them until the next, starting at their mean close.
+    """
+    closes = stocks.pivot(index=DATE, columns=TICKER, values=CLOSE)
+    mcaps = stocks.pivot(index=DATE, columns=TICKER, values=M_CAP)
+    levels, held = [], None
+    for day, members in sorted(top_members(stocks).items()):
+        if held is None:
+            level = closes.loc[day, list(members)].mean()
+        else:
+            growth = closes.loc[day, held] / bought[held]
+            level = base * np.average(growth, weights=weights)
+        if held is None or set(held) != members:
+            held = sorted(members)
+            bought = closes.loc[day, held]
+            weights = mcaps.loc[day, held] if cap_weighted else np.ones(TOP_N)
+            base = level
+        levels.append(level)
+    return levels
+
+
+def test_each_definition_gets_its_members_and_levels(stocks):
+    persist_indices(DEFINITIONS, lookback=DAYS * 2)
+    indices = query_indices()
+    assert sorted(indices[INDEX_NAME].unique()) == ["top3", "top3_cap"]
+
+    members = (
+        duckconn()
+        .execute("SELECT IndexName, Date, Ticker FROM IndexMembers")
+        .fetch_df()
+    )
+    expected_members = top_members(stocks)
+    assert len(set(expected_members.values())) > 1
+    for definition in DEFINITIONS:
+        index_members = members[members[INDEX_NAME] == definition.name]
+        assert {
+            day: frozenset(rows[TICKER]) for day, rows in index_members.groupby(DATE)
+        } == expected_members
+
+        index = indices[indices[INDEX_NAME] == definition.name]
+        assert (index[STOCK_COUNT] == TOP_N).all()
+        assert index[LEVEL].tolist() == pytest.approx(
+            expected_levels(stocks, definition.weighting == CAP_WEIGHT), rel=1e-9
+        )
+
+    # Same members, different weights: the levels only meet on the first date.
+    levels = indices.pivot(index=DATE, columns=INDEX_NAME, values=LEVEL)
+    assert levels["top3"].iat[0] == pytest.approx(levels["top3_cap"].iat[0])
+    assert not np.allclose(levels["top3"], levels["top3_cap"])
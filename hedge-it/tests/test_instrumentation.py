@@ -0,0 +1,28 @@
+import sys
+
+import numpy as np
+import pytest
+
+from hedge_it.commons import span
+from hedge_it.commons.utils.instrumentation import prometheus_text
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="current RSS is read from /proc")
+def test_span_reports_its_own_rss_delta():
+    with span("allocate") as allocate:
+        kept = np.ones(2**24)  # 128 MiB, touched
+    with span("idle") as idle:
+        pass
+
+    assert allocate.rss_delta_bytes >= kept.nbytes * 0.9
+    assert abs(idle.rss_delta_bytes) < kept.nbytes * 0.1
+    # The process peak stays where the first stage left it.
+    assert idle.peak_rss_bytes >= allocate.peak_rss_bytes
+
+
+def test_process_peak_rss_is_one_gauge():
+    with span("gauge"):
+        pass
+    metrics = prometheus_text()
+    assert 'hedge_it_stage_rss_delta_bytes{stage="gauge"}' in metrics
+    assert "\nhedge_it_process_peak_rss_bytes " in metrics
@@ -0,0 +1,92 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from hedge_it.commons.constants import (
+    CLOSE,
+    DATE,
+    DIVISOR,
+    EQUAL_WEIGHTED_INDEX,
+    TICKER,
+)
+from hedge_it.connectors.quote_feed import QuoteFeed, SimulatedFeed
+from hedge_it.processor.index_engine import divisor_index
+from hedge_it.processor.live_index import LiveIndex
+
+CONSTITUENTS = 50
+DATES = pd.bdate_range("2025-01-06", periods=2)
+
+
+def closes_frame(tickers: list, *days) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            (day, ticker, close)
+            for day, prices in zip(DATES, days)
+            for ticker, close in zip(tickers, prices)
+        ],
+        columns=[DATE, TICKER, CLOSE],
+    )
+
+
+@pytest.fixture
+def reference():
+    """Tickers and closes of a rebalance date, and its index row."""
+    rng = np.random.default_rng(0)
+    tickers = [f"T{i:05d}" for i in range(CONSTITUENTS)]
+    closes = rng.uniform(10, 500, CONSTITUENTS)
+    index_df = divisor_index(
+        closes_frame(tickers, closes), closes_frame(tickers, closes)[[DATE, TICKER]]
+    )
+    return tickers, closes, index_df.iloc[0]
+
+
+def test_quote_feed_is_abstract():
+    with pytest.raises(TypeError):
+        QuoteFeed()
+
+
+def test_level_follows_the_divisor_index(reference):
+    tickers, closes, rebalance = reference
+    live = LiveIndex(tickers, closes, closes, rebalance[DIVISOR])
+    assert live.level == pytest.approx(rebalance[EQUAL_WEIGHTED_INDEX])
+
+    feed = SimulatedFeed(tickers, closes, ticks_per_second=0, batch_size=100, seed=1)
+    for ticks in itertools.islice(feed, 200):
+        live.apply(ticks + [("UNLISTED", 1.0)])
+    assert live.ticks == 200 * 100
+
+    # The same last prices as the next day's closes of the daily index.
+    daily = divisor_index(
+        closes_frame(tickers, closes, live.prices),
+        closes_frame(tickers, closes, live.prices)[[DATE, TICKER]],
+        base_level=rebalance[EQUAL_WEIGHTED_INDEX],
+    )
+    assert live.level == pytest.approx(daily[EQUAL_WEIGHTED_INDEX].iat[1], rel=1e-9)
+
+
+def test_resync_recomputes_the_level(reference):
+    tickers, closes, rebalance = reference
+    live = LiveIndex(tickers, closes, closes, rebalance[DIVISOR], resync_ticks=250)
+    feed = SimulatedFeed(tickers, closes, ticks_per_second=0, batch_size=100, seed=1)
+    batches = itertools.islice(feed, 3)
+
+    live.apply(next(batches))
+    live.apply(next(batches))
+    live.level += 1.0  # drift the running sum, the next resync sheds it
+    live.apply(next(batches))
+    assert live.level == float(live.prices @ live.weights)
+
+
+def test_history_keeps_the_last_samples_in_order(reference):
+    tickers, closes, rebalance = reference
+    live = LiveIndex(tickers, closes, closes, rebalance[DIVISOR], history_size=3)
+    for second in range(5):
+        live.level = float(second)
+        live.sample(at=1_700_000_000 + second)
+
+    history = live.history()
+    assert history[EQUAL_WEIGHTED_INDEX].tolist() == [2.0, 3.0, 4.0]
+    assert history[DATE].is_monotonic_increasing
+    assert history[DATE].iat[-1] == pd.Timestamp(1_700_000_004, unit="s")
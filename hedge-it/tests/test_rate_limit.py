@@ -0,0 +1,130 @@
+import os
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+from hedge_it.connectors import ticker_history
+from hedge_it.connectors.rate_limit import AdaptiveRateLimiter, RateLimited
+from hedge_it.connectors.ticker_history import (
+    fetch_ticker_history,
+    map_with_retry_queue,
+)
+
+
+class Throttled(Exception):
+    pass
+
+
+@pytest.fixture
+def limiter(tmp_path) -> AdaptiveRateLimiter:
+    # A high rate and no backoff to wait out, throttles only move the rate.
+    return AdaptiveRateLimiter(
+        os.path.join(tmp_path, "limiter.sqlite"), max_rate=1000.0, base_backoff=0.0
+    )
+
+
+def throttle_first(calls: int):
+    """A call raising `Throttled` `calls` times, then returning "ok"."""
+    attempts = []
+
+    def func():
+        attempts.append(1)
+        if len(attempts) <= calls:
+            raise Throttled()
+        return "ok"
+
+    return func, attempts
+
+
+def test_rate_starts_at_a_quarter_of_max(limiter):
+    assert limiter.rate == pytest.approx(250)
+
+
+def test_success_increases_rate_additively_up_to_max(limiter):
+    limiter.call(lambda: "ok")
+    assert limiter.rate == pytest.approx(250 + 0.1 / 250)
+
+    limiter.increase = 10**6
+    limiter._adjust(False, 0.0)
+    assert limiter.rate == pytest.approx(limiter.max_rate)
+
+
+def test_throttle_halves_rate_down_to_min(limiter):
+    func, attempts = throttle_first(1)
+    assert limiter.call(func, throttle_errors=(Throttled,)) == "ok"
+    assert len(attempts) == 2
+    assert limiter.rate == pytest.approx(125 + 0.1 / 125)
+
+    for _ in range(20):
+        limiter._adjust(True, 0.0)
+    assert limiter.rate == pytest.approx(limiter.min_rate)
+
+
+def test_slow_call_decreases_rate(limiter):
+    limiter._adjust(False, limiter.slow_seconds + 1)
+    assert limiter.rate == pytest.approx(125)
+
+
+def test_throttled_result_is_retried(limiter):
+    results = iter([{}, {}, {"sharesOutstanding": 1}])
+    info = limiter.call(lambda: next(results), is_throttled=lambda info: not info)
+    assert info == {"sharesOutstanding": 1}
+
+
+def test_rate_limited_after_max_retries(limiter):
+    func, attempts = throttle_first(limiter.max_retries + 1)
+    with pytest.raises(RateLimited):
+        limiter.call(func, throttle_errors=(Throttled,))
+    assert len(attempts) == limiter.max_retries + 1
+
+
+def test_limiters_on_one_file_share_the_rate(limiter):
+    other = AdaptiveRateLimiter(limiter.path, max_rate=1000.0)
+    other._adjust(True, 0.0)
+    assert limiter.rate == pytest.approx(125)
+
+
+def test_lowered_max_rate_caps_persisted_rate(limiter):
+    assert AdaptiveRateLimiter(limiter.path, max_rate=1.0).rate == pytest.approx(1.0)
+
+
+def test_retry_queue_requeues_rate_limited_items():
+    attempts = []
+
+    def func(item):
+        attempts.append(item)
+        if item == "b" and attempts.count("b") < 3:
+            raise RateLimited()
+        return item.upper()
+
+    assert map_with_retry_queue(func, ["a", "b", "c"], rounds=3) == ["A", "B", "C"]
+    assert sorted(attempts) == ["a", "b", "b", "b", "c"]
+
+
+def test_retry_queue_gives_up_after_rounds():
+    def func(item):
+        if item == "b":
+            raise RateLimited()
+        return item
+
+    assert map_with_retry_queue(func, ["a", "b", "c"], rounds=2) == ["a", "c"]
+
+
+def test_history_requeues_throttled_tickers_only():
+    requested = []
+
+    class Source:
+        def ticker_history(self, ticker, period=None, start=None):
+            requested.append(ticker)
+            if ticker == "B" and requested.count("B") == 1:
+                raise RateLimited()
+            dates = pd.bdate_range("2025-01-06", periods=3, tz="America/New_York")
+            return pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=dates)
+
+    with mock.patch.object(ticker_history, "data_source", Source):
+        history = fetch_ticker_history(["A", "B", "C"])
+
+    assert sorted(requested) == ["A", "B", "B", "C"]
+    assert history.columns.tolist() == [("Close", "A"), ("Close", "B"), ("Close", "C")]
+    assert history.index.tz is None